@@ -6,4 +6,4 @@ class CartConfig(AppConfig):
     name = "cart"
 
     def ready(self):
-        pass
+        from . import signals  # noqa: F401
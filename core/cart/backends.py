@@ -0,0 +1,156 @@
+import secrets
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+
+class SessionCartBackend:
+    """
+    Cart as a nested dict inside the Django session. The dict is only
+    added on the first write, so reading an empty cart never creates
+    or saves a session.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    @property
+    def items(self):
+        return self.session.get("cart", {"items": {}})["items"]
+
+    def get_writable_items(self):
+        if "cart" not in self.session:
+            self.session["cart"] = {"items": {}}
+        return self.session["cart"]["items"]
+
+    def get_quantities(self):
+        return {
+            product_id: int(item["quantity"])
+            for product_id, item in self.items.items()
+        }
+
+    def get_quantity(self, product_id):
+        item = self.items.get(product_id)
+        return int(item["quantity"]) if item else None
+
+    def add(self, product_id, quantity=1):
+        items = self.get_writable_items()
+        if product_id in items:
+            items[product_id]["quantity"] += quantity
+        else:
+            items[product_id] = {
+                "product_id": product_id,
+                "quantity": quantity,
+            }
+        self.save()
+
+    def update(self, product_id, quantity):
+        if product_id in self.items:
+            self.items[product_id]["quantity"] = quantity
+            self.save()
+
+    def set_quantities(self, quantities):
+        if not quantities:
+            return
+        items = self.get_writable_items()
+        for product_id, quantity in quantities.items():
+            items[product_id] = {
+                "product_id": product_id,
+                "quantity": quantity,
+            }
+        self.save()
+
+    def remove(self, product_id):
+        if product_id in self.items:
+            del self.items[product_id]
+            self.save()
+
+    def clear(self):
+        self.session.pop("cart", None)
+
+    def save(self):
+        if "cart" in self.session:
+            self.session.modified = True
+
+
+class RedisCartBackend:
+    """
+    Cart as a Redis hash of product id to quantity. Every change is a
+    single atomic command, so concurrent tabs cannot overwrite each
+    other and the session is only written once, to store the cart id.
+    """
+
+    key_prefix = "cart"
+    # HSET only when the product is already in the cart
+    update_script = """
+        if redis.call("HEXISTS", KEYS[1], ARGV[1]) == 1 then
+            redis.call("HSET", KEYS[1], ARGV[1], ARGV[2])
+            redis.call("EXPIRE", KEYS[1], ARGV[3])
+        end
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.redis = get_redis_connection(settings.CART_REDIS_ALIAS)
+        self.timeout = settings.SESSION_COOKIE_AGE
+
+    def get_key(self, create=False):
+        cart_id = self.session.get("cart_id")
+        if cart_id is None:
+            if not create:
+                return None
+            cart_id = self.session["cart_id"] = secrets.token_urlsafe(16)
+        return f"{self.key_prefix}:{cart_id}"
+
+    def write(self, command):
+        """Run command(pipeline, key) and refresh the ttl atomically"""
+        key = self.get_key(create=True)
+        pipeline = self.redis.pipeline()
+        command(pipeline, key)
+        pipeline.expire(key, self.timeout)
+        pipeline.execute()
+
+    def get_quantities(self):
+        key = self.get_key()
+        if key is None:
+            return {}
+        return {
+            product_id.decode(): int(quantity)
+            for product_id, quantity in self.redis.hgetall(key).items()
+        }
+
+    def get_quantity(self, product_id):
+        key = self.get_key()
+        quantity = self.redis.hget(key, product_id) if key else None
+        return None if quantity is None else int(quantity)
+
+    def add(self, product_id, quantity=1):
+        self.write(
+            lambda pipeline, key: pipeline.hincrby(key, product_id, quantity)
+        )
+
+    def update(self, product_id, quantity):
+        key = self.get_key()
+        if key is not None:
+            self.redis.eval(
+                self.update_script, 1, key, product_id, quantity, self.timeout
+            )
+
+    def set_quantities(self, quantities):
+        if quantities:
+            self.write(
+                lambda pipeline, key: pipeline.hset(key, mapping=quantities)
+            )
+
+    def remove(self, product_id):
+        key = self.get_key()
+        if key is not None:
+            self.redis.hdel(key, product_id)
+
+    def clear(self):
+        key = self.get_key()
+        if key is not None:
+            self.redis.delete(key)
+
+    def save(self):
+        pass
@@ -1,82 +1,208 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+from django_redis import get_redis_connection
+
 from cart.models import CartItemModel, CartModel
 from shop.models import ProductModel, ProductStatusType
 
+PENDING_CART_TIMEOUT = 60 * 60 * 24 * 7
+DIRTY_CARTS_KEY = "dirty_carts"
+
+
+def get_pending_cart_key(user_id):
+    return f"pending_cart:{user_id}"
+
+
+def save_cart_items(user_id, items):
+    """
+    Write the session cart items of a user to the database with one
+    bulk upsert and one delete, whatever the number of lines
+    """
+    quantities = {
+        int(item["product_id"]): int(item["quantity"])
+        for item in items.values()
+    }
+    with transaction.atomic():
+        cart, created = CartModel.objects.get_or_create(user_id=user_id)
+        product_ids = list(
+            ProductModel.objects.filter(
+                id__in=quantities, status=ProductStatusType.publish.value
+            ).values_list("id", flat=True)
+        )
+        CartItemModel.objects.bulk_create(
+            [
+                CartItemModel(
+                    cart=cart, product_id=pk, quantity=quantities[pk]
+                )
+                for pk in product_ids
+            ],
+            update_conflicts=True,
+            unique_fields=["cart", "product"],
+            update_fields=["quantity", "updated_date"],
+        )
+        CartItemModel.objects.filter(cart=cart).exclude(
+            product_id__in=product_ids
+        ).delete()
+
+
+def get_dirty_carts_redis():
+    """Redis connection of the cache, None when the cache is not Redis"""
+    try:
+        return get_redis_connection(settings.CART_REDIS_ALIAS)
+    except NotImplementedError:
+        return None
+
+
+def add_dirty_cart(user_id):
+    redis = get_dirty_carts_redis()
+    if redis is not None:
+        redis.sadd(cache.make_key(DIRTY_CARTS_KEY), user_id)
+        return
+    # Local caches live in one process, there is no one to race with
+    dirty_carts = cache.get(DIRTY_CARTS_KEY, set())
+    if user_id not in dirty_carts:
+        dirty_carts.add(user_id)
+        cache.set(DIRTY_CARTS_KEY, dirty_carts, None)
+
+
+def discard_dirty_cart(user_id):
+    redis = get_dirty_carts_redis()
+    if redis is not None:
+        redis.srem(cache.make_key(DIRTY_CARTS_KEY), user_id)
+        return
+    dirty_carts = cache.get(DIRTY_CARTS_KEY, set())
+    if user_id in dirty_carts:
+        dirty_carts.discard(user_id)
+        cache.set(DIRTY_CARTS_KEY, dirty_carts, None)
+
+
+def pop_dirty_carts():
+    """Take the user ids of all dirty carts out of the set"""
+    redis = get_dirty_carts_redis()
+    if redis is not None:
+        key = cache.make_key(DIRTY_CARTS_KEY)
+        return [int(user_id) for user_id in redis.spop(key, redis.scard(key))]
+    dirty_carts = cache.get(DIRTY_CARTS_KEY, set())
+    cache.delete(DIRTY_CARTS_KEY)
+    return list(dirty_carts)
+
+
+def forget_pending_cart(user_id):
+    cache.delete(get_pending_cart_key(user_id))
+    discard_dirty_cart(user_id)
+
+
+def flush_pending_carts():
+    """
+    Persist the carts marked dirty since the last flush, returns their
+    number. The ids are popped before the snapshots are read, so a cart
+    changed while flushing is marked dirty again for the next flush.
+    """
+    flushed = 0
+    for user_id in pop_dirty_carts():
+        items = cache.get(get_pending_cart_key(user_id))
+        if items is not None:
+            save_cart_items(user_id, items)
+            flushed += 1
+    return flushed
+
+
+def flush_pending_cart(user_id):
+    """Persist the snapshot of one user's cart if it was not flushed"""
+    items = cache.get(get_pending_cart_key(user_id))
+    if items is not None:
+        save_cart_items(user_id, items)
+
+
+def get_cart_backend_class():
+    return import_string(settings.CART_BACKEND)
+
 
 class CartSession:
+    """
+    Cart of a visitor, stored by the backend set in CART_BACKEND: the
+    session by default or a Redis hash.
+    """
+
     def __init__(self, session):
         self.session = session
-        self._cart = self.session.setdefault("cart", {"items": {}})
+        self.backend = get_cart_backend_class()(session)
 
     def update_product_quantity(self, product_id, quantity):
-        product_id = str(product_id)
-        if product_id in self._cart["items"]:
-            self._cart["items"][product_id]["quantity"] = int(quantity)
-            self.save()
+        self.backend.update(str(product_id), int(quantity))
 
     def remove_product(self, product_id):
-        product_id = str(product_id)
-        if product_id in self._cart["items"]:
-            del self._cart["items"][product_id]
-            self.save()
+        self.backend.remove(str(product_id))
 
     def is_product(self, product_id):
-        product_id = str(product_id)
-        if product_id in self._cart["items"]:
-            return True
-        return False
+        return self.backend.get_quantity(str(product_id)) is not None
 
     def get_product_quantity(self, product_id):
-
-        try:
-            return self._cart["items"][str(product_id)]["quantity"]
-        except BaseException:
-            return 0
+        return self.backend.get_quantity(str(product_id)) or 0
 
     def add_product(self, product_id):
-        product_id = str(product_id)
-        if product_id in self._cart["items"]:
-            self._cart["items"][product_id]["quantity"] += 1
-        else:
-            self._cart["items"][product_id] = {
-                "product_id": product_id,
-                "quantity": 1,
-            }
-        self.save()
+        self.backend.add(str(product_id))
 
     def clear(self):
-        self._cart = self.session["cart"] = {"items": {}}
-        self.save()
+        self.backend.clear()
 
     def get_cart_dict(self):
-        return self._cart
+        return {
+            "items": {
+                product_id: {"product_id": product_id, "quantity": quantity}
+                for product_id, quantity in (
+                    self.backend.get_quantities().items()
+                )
+            }
+        }
+
+    def get_products(self, product_ids):
+        """
+        Published products by id, loaded with one query and memoized on
+        the session, which lives as long as the request, so every
+        CartSession of the request shares them.
+        """
+        products = self.session.__dict__.setdefault("_cart_products", {})
+        product_ids = [int(product_id) for product_id in product_ids]
+        missing = [pk for pk in product_ids if pk not in products]
+        if missing:
+            found = ProductModel.objects.filter(
+                status=ProductStatusType.publish.value
+            ).in_bulk(missing)
+            for pk in missing:
+                products[pk] = found.get(pk)
+        return {
+            pk: products[pk] for pk in product_ids if products[pk] is not None
+        }
 
     def get_cart_items(self):
+        """Cart lines with their products, lines of unpublished skipped"""
+        quantities = self.backend.get_quantities()
+        products = self.get_products(quantities)
         cart_items = {}
-        for item_key in self._cart["items"]:
-            item = self._cart["items"][item_key]
-            product_obj = ProductModel.objects.get(
-                id=item["product_id"], status=ProductStatusType.publish.value
-            )
-            cart_items[item_key] = {
-                **item,
+        for product_id, quantity in quantities.items():
+            product_obj = products.get(int(product_id))
+            if product_obj is None:
+                continue
+            cart_items[product_id] = {
+                "product_id": product_id,
+                "quantity": quantity,
                 "product_obj": product_obj,
-                "total_price": item["quantity"] * product_obj.get_price(),
+                "total_price": quantity * int(product_obj.final_price),
             }
         return cart_items
 
     def get_total_product_payment_by_discount(self, product_id):
-
-        quantity = (
-            self._cart.get("items", {})
-            .get(str(product_id), {})
-            .get("quantity", 0)
-        )
+        quantity = self.get_product_quantity(product_id)
 
         if not quantity:
             return 0
-        return quantity * int(
-            ProductModel.objects.get(id=product_id).get_price()
-        )
+        product_obj = self.get_products([product_id]).get(int(product_id))
+        if product_obj is None:
+            return 0
+        return quantity * int(product_obj.final_price)
 
     def get_total_payment_amount(self):
         return sum(
@@ -84,46 +210,39 @@ class CartSession:
         )
 
     def get_total_quantity(self):
-        return sum(
-            int(item["quantity"]) for item in self._cart["items"].values()
-        )
+        return sum(self.backend.get_quantities().values())
 
     def save(self):
-        self.session.modified = True
+        self.backend.save()
 
     def sync_cart_items_from_db(self, user):
+        # Changes made in another session may still wait for the flush
+        flush_pending_cart(user.pk)
         cart, created = CartModel.objects.get_or_create(user=user)
-        cart_items = CartItemModel.objects.filter(cart=cart)
-
-        for cart_item in cart_items:
-            item_id = str(cart_item.product.id)
-            if item_id in self._cart["items"]:
-                self._cart["items"][item_id]["quantity"] = cart_item.quantity
-            else:
-                self._cart["items"][item_id] = {
-                    "product_id": item_id,
-                    "quantity": cart_item.quantity,
-                }
+        self.backend.set_quantities(
+            {
+                str(product_id): quantity
+                for product_id, quantity in CartItemModel.objects.filter(
+                    cart=cart
+                ).values_list("product_id", "quantity")
+            }
+        )
         self.merge_session_cart_in_db(user)
         self.save()
 
-    def merge_session_cart_in_db(self, user):
-        cart, created = CartModel.objects.get_or_create(user=user)
-        products = {
-            item["product_id"]: item for item in self._cart["items"].values()
-        }
+    def mark_dirty(self, user):
+        """
+        Keep the cart of a user for the next flush instead of writing it
+        to the database on every change. Checkout and logout flush it
+        right away, flush_dirty_carts catches the rest.
+        """
+        cache.set(
+            get_pending_cart_key(user.pk),
+            self.get_cart_dict()["items"],
+            PENDING_CART_TIMEOUT,
+        )
+        add_dirty_cart(user.pk)
 
-        for item_id, item in products.items():
-            product_obj = ProductModel.objects.get(
-                id=item_id, status=ProductStatusType.publish.value
-            )
-            cart_item, created = CartItemModel.objects.get_or_create(
-                cart=cart, product=product_obj
-            )
-            cart_item.quantity = item["quantity"]
-            cart_item.save()
-
-        session_product_ids = products.keys()
-        CartItemModel.objects.filter(cart=cart).exclude(
-            product__id__in=session_product_ids
-        ).delete()
+    def merge_session_cart_in_db(self, user):
+        save_cart_items(user.pk, self.get_cart_dict()["items"])
+        forget_pending_cart(user.pk)
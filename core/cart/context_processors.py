@@ -1,6 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
 from .cart import CartSession
 
 
 def cart_processor(request):
-    cart = CartSession(request.session)
-    return {"cart": cart}
+    """The cart is only built, and the session read, if a template uses it"""
+    return {"cart": SimpleLazyObject(lambda: CartSession(request.session))}
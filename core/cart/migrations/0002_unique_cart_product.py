@@ -0,0 +1,36 @@
+# Generated by Django 4.2.18 on 2026-10-18 18:27
+
+from django.db import migrations, models
+
+
+def remove_duplicate_cart_items(apps, schema_editor):
+    """Keep the most recent line of each product in a cart"""
+    CartItemModel = apps.get_model("cart", "CartItemModel")
+    seen = set()
+    duplicate_ids = []
+    for pk, cart_id, product_id in CartItemModel.objects.order_by(
+        "-updated_date", "-id"
+    ).values_list("id", "cart_id", "product_id"):
+        if (cart_id, product_id) in seen:
+            duplicate_ids.append(pk)
+        seen.add((cart_id, product_id))
+    CartItemModel.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cart", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_cart_items, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="cartitemmodel",
+            constraint=models.UniqueConstraint(
+                fields=("cart", "product"), name="unique_cart_product"
+            ),
+        ),
+    ]
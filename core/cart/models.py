@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F, Sum
 
 
 class CartModel(models.Model):
@@ -11,10 +12,10 @@ class CartModel(models.Model):
         return self.user.email
 
     def calculate_total_price(self):
-        return sum(
-            item.product.get_price() * item.quantity
-            for item in self.cart_items.all()
-        )
+        total = self.cart_items.aggregate(
+            total=Sum(F("product__final_price") * F("quantity"))
+        )["total"]
+        return int(total or 0)
 
 
 class CartItemModel(models.Model):
@@ -27,5 +28,12 @@ class CartItemModel(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "product"], name="unique_cart_product"
+            )
+        ]
+
     def __str__(self):
         return f"{self.product.title} - {self.cart.id}"
@@ -12,5 +12,7 @@ def post_login(sender, user, request, **kwargs):
 
 @receiver(user_logged_out)
 def pre_logout(sender, user, request, **kwargs):
+    if user is None:
+        return
     cart = CartSession(request.session)
     cart.merge_session_cart_in_db(user)
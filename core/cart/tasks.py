@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .cart import flush_pending_carts
+
+
+@shared_task
+def flush_dirty_carts():
+    return flush_pending_carts()
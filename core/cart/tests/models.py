@@ -1,8 +1,14 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
 
 from shop.models import ProductCategoryModel, ProductModel, ProductStatusType
 
+from ..backends import RedisCartBackend, SessionCartBackend
+from ..cart import CartSession, flush_pending_carts, pop_dirty_carts
 from ..models import CartItemModel, CartModel
 
 User = get_user_model()
@@ -52,3 +58,135 @@ class TestCartItem(TestCart):
         self.assertEqual(cart_item.cart, self.cart)
         self.assertEqual(cart_item.product, self.product)
         self.assertEqual(cart_item.quantity, 2)
+
+
+class TestCartSession(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="testuser@example.com",
+            password="test123",
+        )
+        cls.category = ProductCategoryModel.objects.create(
+            title="Category test", slug="category-test"
+        )
+        cls.products = [
+            ProductModel.objects.create(
+                user=cls.user,
+                category=cls.category,
+                title=f"Product test {number}",
+                slug=f"product-test-{number}",
+                description="This is description",
+                stock=10,
+                price=100,
+                status=ProductStatusType.publish.value,
+            )
+            for number in range(30)
+        ]
+
+    def setUp(self):
+        self.session = SessionStore()
+        cart = CartSession(self.session)
+        for product in self.products:
+            cart.add_product(product.id)
+
+    def test_cart_hydration_is_one_query(self):
+        with self.assertNumQueries(1):
+            cart = CartSession(self.session)
+            self.assertEqual(len(cart.get_cart_items()), 30)
+            self.assertEqual(cart.get_total_payment_amount(), 3000)
+            # a second cart of the same request shares the products
+            self.assertEqual(
+                CartSession(
+                    self.session
+                ).get_total_product_payment_by_discount(self.products[0].id),
+                100,
+            )
+
+    def test_unpublished_products_are_skipped(self):
+        ProductModel.objects.filter(pk=self.products[0].pk).update(
+            status=ProductStatusType.draft.value
+        )
+        cart_items = CartSession(self.session).get_cart_items()
+        self.assertEqual(len(cart_items), 29)
+        self.assertNotIn(str(self.products[0].id), cart_items)
+
+    def test_merge_in_db_is_a_bulk_upsert(self):
+        cart = CartSession(self.session)
+        cart.merge_session_cart_in_db(self.user)
+        cart.update_product_quantity(self.products[0].id, 3)
+        cart.remove_product(self.products[1].id)
+        # cart, published products, upsert and delete in a savepoint
+        with self.assertNumQueries(6):
+            cart.merge_session_cart_in_db(self.user)
+        cart_items = CartItemModel.objects.filter(cart__user=self.user)
+        self.assertEqual(cart_items.count(), 29)
+        self.assertEqual(cart_items.get(product=self.products[0]).quantity, 3)
+
+    def test_dirty_carts_are_flushed(self):
+        cache.clear()
+        CartSession(self.session).mark_dirty(self.user)
+        self.assertFalse(CartItemModel.objects.exists())
+
+        self.assertEqual(flush_pending_carts(), 1)
+        self.assertEqual(
+            CartItemModel.objects.filter(cart__user=self.user).count(), 30
+        )
+        self.assertEqual(flush_pending_carts(), 0)
+
+    def test_cart_changed_while_flushing_stays_dirty(self):
+        cache.clear()
+        cart = CartSession(self.session)
+        cart.mark_dirty(self.user)
+        dirty_carts = pop_dirty_carts()
+        cart.remove_product(self.products[0].id)
+        cart.mark_dirty(self.user)
+        self.assertEqual(dirty_carts, [self.user.pk])
+        self.assertEqual(pop_dirty_carts(), [self.user.pk])
+
+    def test_login_keeps_unflushed_cart(self):
+        cache.clear()
+        CartSession(self.session).mark_dirty(self.user)
+
+        other_session = SessionStore()
+        CartSession(other_session).sync_cart_items_from_db(self.user)
+        self.assertEqual(CartSession(other_session).get_total_quantity(), 30)
+        self.assertEqual(
+            CartItemModel.objects.filter(cart__user=self.user).count(), 30
+        )
+        self.assertEqual(flush_pending_carts(), 0)
+
+
+class TestCartBackends(TestCase):
+    def test_session_backend_is_the_default(self):
+        cart = CartSession(SessionStore())
+        self.assertIsInstance(cart.backend, SessionCartBackend)
+
+    @override_settings(CART_BACKEND="cart.backends.RedisCartBackend")
+    def test_redis_backend(self):
+        try:
+            get_redis_connection("default").ping()
+        except (NotImplementedError, RedisError):
+            self.skipTest("the default cache is not Redis")
+        session = SessionStore()
+        cart = CartSession(session)
+        self.assertIsInstance(cart.backend, RedisCartBackend)
+        # reading an empty cart does not touch the session
+        self.assertEqual(cart.get_total_quantity(), 0)
+        self.assertNotIn("cart_id", session)
+
+        cart.add_product(1)
+        CartSession(session).add_product(1)
+        cart.add_product(2)
+        cart.update_product_quantity(3, 5)
+        self.assertEqual(cart.get_product_quantity(1), 2)
+        self.assertFalse(cart.is_product(3))
+        self.assertEqual(set(session.keys()), {"cart_id"})
+
+        cart.remove_product(2)
+        self.assertEqual(
+            cart.get_cart_dict(),
+            {"items": {"1": {"product_id": "1", "quantity": 2}}},
+        )
+        cart.clear()
+        self.assertEqual(cart.get_total_quantity(), 0)
@@ -1,9 +1,12 @@
 import json
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
+from cart.tasks import flush_dirty_carts
 from shop.models import ProductCategoryModel, ProductModel, ProductStatusType
 
 User = get_user_model()
@@ -41,15 +44,43 @@ class SessionAddProductViewTest(TestCase):
         )
 
     def test_add_product_authenticated(self):
+        cache.clear()
         self.client.force_login(self.user)
         response = self.client.post(self.url, {"product_id": self.product_id})
         self.assertEqual(response.status_code, 200)
         from cart.models import CartItemModel
 
+        # written behind, by the periodic flush
+        self.assertFalse(
+            CartItemModel.objects.filter(product=self.product).exists()
+        )
+        flush_dirty_carts()
         self.assertTrue(
             CartItemModel.objects.filter(product=self.product).exists()
         )
 
+    def test_logout_persists_cart(self):
+        self.client.force_login(self.user)
+        self.client.post(self.url, {"product_id": self.product_id})
+        self.client.logout()
+        from cart.models import CartItemModel
+
+        self.assertTrue(
+            CartItemModel.objects.filter(product=self.product).exists()
+        )
+
+
+class AnonymousSessionTest(TestCase):
+    def test_browsing_without_cart_creates_no_session(self):
+        for url in (
+            reverse("shop:product-grid"),
+            reverse("shop:api-v1:personalization"),
+            reverse("cart:cart-summary"),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
 
 class SessionRemoveProductViewTest(TestCase):
     def setUp(self):
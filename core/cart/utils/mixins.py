@@ -12,7 +12,7 @@ class CartAPIMixin:
         Finalize cart operations and return standardized response
         """
         if request.user.is_authenticated:
-            cart.merge_session_cart_in_db(request.user)
+            cart.mark_dirty(request.user)
 
         response_data = {
             "cart": cart.get_cart_dict(),
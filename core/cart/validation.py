@@ -2,11 +2,7 @@ from shop.models import ProductModel, ProductStatusType
 
 
 def is_validate_quantity_product(cart, product_id):
-    cart = cart._cart["items"]
-    if product_id in cart:
-        quantity = cart[product_id]["quantity"]
-    else:
-        quantity = 0
+    quantity = cart.get_product_quantity(product_id)
     product_obj = ProductModel.objects.get(
         id=product_id, status=ProductStatusType.publish.value
     )
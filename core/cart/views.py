@@ -18,7 +18,7 @@ class SessionAddProductView(View):
             cart.add_product(product_id)
 
         if request.user.is_authenticated:
-            cart.merge_session_cart_in_db(request.user)
+            cart.mark_dirty(request.user)
         return JsonResponse(
             {
                 "cart": cart.get_cart_dict(),
@@ -35,7 +35,7 @@ class SessionRemoveProductView(View):
         if product_id:
             cart.remove_product(product_id)
         if request.user.is_authenticated:
-            cart.merge_session_cart_in_db(request.user)
+            cart.mark_dirty(request.user)
         return JsonResponse(
             {
                 "cart": cart.get_cart_dict(),
@@ -53,7 +53,7 @@ class SessionUpdateProductQuantityView(View):
         if product_id and quantity:
             cart.update_product_quantity(product_id, quantity)
         if request.user.is_authenticated:
-            cart.merge_session_cart_in_db(request.user)
+            cart.mark_dirty(request.user)
         return JsonResponse(
             {
                 "cart": cart.get_cart_dict(),
@@ -15,6 +15,7 @@ import sys
 from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -65,6 +66,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "shop.middleware.EdgeCacheMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -180,6 +182,18 @@ AUTH_USER_MODEL = "accounts.CustomUser"
 
 # celery configurations
 CELERY_BROKER_URL = "redis://redis:6379/1"
+CELERY_BEAT_SCHEDULE = {
+    "flush-dirty-carts": {
+        "task": "cart.tasks.flush_dirty_carts",
+        "schedule": 60 * 5,
+    },
+    # Similar products only change with orders and features, nightly
+    # is fresh enough and keeps the full rebuild off peak hours
+    "update-similar-products": {
+        "task": "shop.tasks.update_similar_products",
+        "schedule": crontab(hour=3, minute=0),
+    },
+}
 
 
 # ckeditor configurations
@@ -219,6 +233,20 @@ CACHES = {
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
 
+# cart storage, cart.backends.RedisCartBackend keeps each cart in a
+# Redis hash of the CART_REDIS_ALIAS cache instead of the session
+CART_BACKEND = config(
+    "CART_BACKEND", default="cart.backends.SessionCartBackend"
+)
+CART_REDIS_ALIAS = "default"
+
+# edge (nginx/CDN) cache of anonymous catalog responses
+EDGE_CACHE_TIMEOUT = config("EDGE_CACHE_TIMEOUT", cast=int, default=60)
+EDGE_CACHE_INVALIDATOR = config(
+    "EDGE_CACHE_INVALIDATOR", default="shop.surrogate.LocalInvalidator"
+)
+EDGE_CACHE_PURGE_URL = config("EDGE_CACHE_PURGE_URL", default="http://nginx/")
+
 # python-slugify configuration
 SLUGIFY_USE_UNICODE = True
 
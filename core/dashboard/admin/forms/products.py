@@ -59,19 +59,16 @@ class ProductFeatureForm(forms.Form):
         product_id = kwargs.pop("product_id")
         super().__init__(*args, **kwargs)
         product = ProductModel.objects.get(id=product_id)
-        all_features = product.category.get_all_features()
+        all_features = product.category.get_feature_schema()
 
         for feature in all_features:
+            has_options = bool(feature.options.all())
             attrs = {
-                "class": (
-                    "form-select"
-                    if feature.options.exists()
-                    else "form-control"
-                ),
+                "class": "form-select" if has_options else "form-control",
                 "data-is-required": str(feature.is_required),
             }
 
-            if feature.options.exists():
+            if has_options:
                 self.fields[f"feature_{feature.id}"] = forms.ChoiceField(
                     choices=self._get_choices_with_empty(feature),
                     label=feature.name,
@@ -8,6 +8,11 @@ urlpatterns = [
         views.AdminProductListView.as_view(),
         name="product-list",
     ),
+    path(
+        "product/export/",
+        views.AdminProductExportView.as_view(),
+        name="product-export",
+    ),
     path(
         "product/create/",
         views.AdminProductCreateView.as_view(),
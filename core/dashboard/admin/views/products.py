@@ -2,6 +2,7 @@ from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.core.exceptions import FieldError
+from django.http import HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
 from django.views.generic import (
@@ -23,6 +24,8 @@ from shop.models import (
     ProductModel,
     ProductStatusType,
 )
+from shop.exports import get_export_response
+from shop.search import search_products
 
 from ..forms import ProductFeatureForm, ProductImageForm
 
@@ -39,7 +42,7 @@ class AdminProductListView(
     def get_queryset(self):
         queryset = ProductModel.objects.all()
         if search_q := self.request.GET.get("q"):
-            queryset = queryset.filter(title__icontains=search_q)
+            queryset = search_products(queryset, search_q)
         if category_id := self.request.GET.get("category_id"):
             queryset = queryset.filter(category__id=category_id)
         if min_price := self.request.GET.get("min_price"):
@@ -60,6 +63,18 @@ class AdminProductListView(
         return context
 
 
+class AdminProductExportView(AdminProductListView):
+    """Stream the filtered product list as csv or jsonl"""
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return get_export_response(
+                self.get_queryset(), request.GET.get("export_format", "csv")
+            )
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+
+
 class AdminProductCreateView(
     LoginRequiredMixin, HasAdminAccessPermission, CreateView
 ):
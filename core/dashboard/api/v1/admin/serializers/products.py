@@ -36,9 +36,14 @@ class CategoryFeatureSerializer(serializers.ModelSerializer):
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    derivatives = serializers.SerializerMethodField()
+
+    def get_derivatives(self, obj):
+        return obj.get_derivative_urls()
+
     class Meta:
         model = ProductImageModel
-        fields = ["id", "file"]
+        fields = ["id", "file", "derivatives"]
 
 
 class ProductFeatureSerializer(serializers.ModelSerializer):
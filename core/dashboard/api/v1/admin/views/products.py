@@ -7,6 +7,7 @@ from rest_framework.response import Response
 
 from dashboard.api.v1.pagination import CustomPagination
 from dashboard.api.v1.permissions import IsAdminOrSuperUser
+from shop.exports import get_export_response
 from shop.models import (
     CategoryFeature,
     ProductCategoryModel,
@@ -50,6 +51,18 @@ class ProductViewSet(viewsets.ModelViewSet):
             status=status.HTTP_204_NO_CONTENT,
         )
 
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            return get_export_response(
+                queryset, request.query_params.get("export_format", "csv")
+            )
+        except ValueError as error:
+            return Response(
+                {"error": str(error)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
     @action(detail=True, methods=["post"])
     def add_image(self, request, pk=None):
         product = self.get_object()
@@ -1,13 +1,17 @@
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from shop.api.v1.pagination import KeysetPaginationMixin
 
-class CustomPagination(PageNumberPagination):
+
+class CustomPagination(KeysetPaginationMixin, PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
 
     def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return super().get_paginated_response(data)
         return Response(
             {
                 "pagination": {
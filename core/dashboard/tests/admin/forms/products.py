@@ -2,6 +2,7 @@ from io import BytesIO
 
 from django import forms
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from PIL import Image
@@ -111,6 +112,10 @@ class AdminProductImageFormTest(TestCase):
 
 
 class AdminProductFeatureFormTest(TestCase):
+    def setUp(self):
+        # feature schemas cached by an earlier test may share these ids
+        cache.clear()
+
     @classmethod
     def setUpTestData(cls):
         cls.admin = User.objects.create_user(
@@ -1,4 +1,9 @@
+import csv
+import io
+import json
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse, reverse_lazy
 
@@ -466,6 +471,10 @@ class AdminAddProductFeatureViewTest(TestCase):
 
 
 class AdminEditProductFeatureViewTest(TestCase):
+    def setUp(self):
+        # feature schemas cached by an earlier test may share these ids
+        cache.clear()
+
     @classmethod
     def setUpTestData(cls):
         cls.user = User.objects.create_user(
@@ -588,3 +597,101 @@ class AdminEditProductFeatureViewTest(TestCase):
         self.client.post(self.url, form_data)
 
         self.assertEqual(ProductFeature.objects.count(), 1)
+
+
+class AdminProductExportViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="test@example.com", password="Test123/"
+        )
+        cls.admin = User.objects.create_user(
+            email="admin@example.com",
+            password="Admin123/",
+            type=UserType.admin.value,
+        )
+
+        cls.parent = ProductCategoryModel.objects.create(
+            title="Parent", slug="parent"
+        )
+        cls.category = ProductCategoryModel.objects.create(
+            title="Child", slug="child", parent=cls.parent
+        )
+        cls.color = CategoryFeature.objects.create(
+            category=cls.parent, name="color"
+        )
+        cls.red = FeatureOption.objects.create(feature=cls.color, value="red")
+        cls.size = CategoryFeature.objects.create(
+            category=cls.category, name="size"
+        )
+
+        cls.product1 = ProductModel.objects.create(
+            user=cls.user,
+            category=cls.category,
+            title="Product test 1",
+            slug="product-test-1",
+            description="This is description",
+            stock=10,
+            discount_percent=20,
+            price=100,
+            status=ProductStatusType.publish.value,
+        )
+        ProductFeature.objects.create(
+            product=cls.product1, feature=cls.color, option=cls.red
+        )
+        ProductFeature.objects.create(
+            product=cls.product1, feature=cls.size, value="XL"
+        )
+        cls.product2 = ProductModel.objects.create(
+            user=cls.user,
+            category=cls.category,
+            title="Product test 2",
+            slug="product-test-2",
+            description="This is description",
+            price=12,
+        )
+
+        cls.url = reverse("dashboard:admin:product-export")
+        cls.api_url = reverse("dashboard:api-v1:admin:product-export")
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode("utf-8-sig")
+
+    def test_customer_user(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.api_url).status_code, 403)
+
+    def test_export_csv(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(self.url, {"q": "Product test 1"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["slug"], "product-test-1")
+        self.assertEqual(rows[0]["category_path"], "Parent / Child")
+        self.assertEqual(rows[0]["final_price"], "80")
+        self.assertEqual(rows[0]["status"], "publish")
+        self.assertEqual(rows[0]["feature:color"], "red")
+        self.assertEqual(rows[0]["feature:size"], "XL")
+
+    def test_export_jsonl_from_api(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(self.api_url, {"export_format": "jsonl"})
+
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(
+            {row["slug"] for row in rows}, {"product-test-1", "product-test-2"}
+        )
+        product1 = next(row for row in rows if row["id"] == self.product1.id)
+        self.assertEqual(product1["features"], {"color": "red", "size": "XL"})
+
+    def test_unsupported_format(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(self.api_url, {"export_format": "xml"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url, {"export_format": "xml"})
+        self.assertEqual(response.status_code, 400)
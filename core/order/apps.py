@@ -6,6 +6,6 @@ class OrderConfig(AppConfig):
     name = "order"
 
     def ready(self):
-        pass
+        from . import signals  # noqa: F401
 
         return super().ready()
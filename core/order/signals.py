@@ -1,6 +1,5 @@
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import F
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -17,7 +16,8 @@ def update_product_quantity(sender, instance, created, **kwargs):
                 pk=instance.product.pk
             )
             if product.stock >= instance.quantity:
-                product.stock = F("stock") - instance.quantity
-                product.save()
+                # the row is locked, the remaining stock is known exactly
+                product.stock -= instance.quantity
+                product.save(update_fields=["stock"])
             else:
                 raise ValidationError(f"موجودی {product.title} کافی نیست!")
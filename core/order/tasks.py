@@ -24,6 +24,6 @@ def cancel_expired_pending_orders():
             for order_item in order.order_items.all():
                 product = order_item.product
                 product.stock += order_item.quantity
-                product.save()
+                product.save(update_fields=["stock"])
 
                 order_item.delete()
@@ -130,6 +130,32 @@ class OrderCheckOutViewTest(TestCase):
         self.mock_zarinpal_patcher.stop()
         self.mock_cart_session_signal_patcher.stop()
 
+    def test_post_checkout_decrements_stock(self):
+        self.client.post(
+            self.checkout_url, {"address_id": self.address.id, "coupon": ""}
+        )
+        self.product1.refresh_from_db()
+        self.product2.refresh_from_db()
+        self.assertEqual((self.product1.stock, self.product2.stock), (5, 5))
+
+    def test_post_checkout_out_of_stock_keeps_nothing(self):
+        # sold out after the cart was validated
+        ProductModel.objects.filter(pk=self.product2.pk).update(stock=1)
+        response = self.client.post(
+            self.checkout_url, {"address_id": self.address.id, "coupon": ""}
+        )
+
+        self.assertRedirects(
+            response, self.cart_summary_url, fetch_redirect_response=False
+        )
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn(f"موجودی {self.product2.title} کافی نیست!", messages)
+        self.assertFalse(OrderModel.objects.exists())
+        self.assertFalse(OrderItemModel.objects.exists())
+        self.product1.refresh_from_db()
+        self.assertEqual(self.product1.stock, 15)
+        self.assertEqual(self.cart.cart_items.count(), 2)
+
     def test_anonymous_user(self):
         self.client.logout()
         response = self.client.get(self.checkout_url)
@@ -1,5 +1,7 @@
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
@@ -44,9 +46,14 @@ class OrderCheckOutView(
             messages.warning(self.request, validate["message"])
             return redirect("cart:cart-summary")
         cart = CartModel.objects.get(user=user)
-        order = self.create_order(address)
-
-        self.create_order_items(order, cart)
+        try:
+            # stock ran out since the validation, nothing is kept
+            with transaction.atomic():
+                order = self.create_order(address)
+                self.create_order_items(order, cart)
+        except ValidationError as error:
+            messages.warning(self.request, error.messages[0])
+            return redirect("cart:cart-summary")
         self.clear_cart(cart)
 
         total_price = order.calculate_total_price()
@@ -1,8 +1,17 @@
 from django.contrib import admin
 
-from .models import ReviewModel
+from .models import ReviewModel, ReviewStatusType
 
 
 @admin.register(ReviewModel)
 class ReviewModelAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "product", "rate", "status", "created_date")
+    actions = ("accept_reviews", "reject_reviews")
+
+    @admin.action(description="تایید نظرات انتخاب شده")
+    def accept_reviews(self, request, queryset):
+        queryset.update_status(ReviewStatusType.accepted.value)
+
+    @admin.action(description="رد نظرات انتخاب شده")
+    def reject_reviews(self, request, queryset):
+        queryset.update_status(ReviewStatusType.rejected.value)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from review.models import ReviewStatsModel
+
+
+class Command(BaseCommand):
+    help = "محاسبه دوباره آمار نظرات تایید شده همه محصولات"
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        total = ReviewStatsModel.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Review stats rebuilt for {total} products.")
+        )
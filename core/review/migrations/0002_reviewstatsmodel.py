@@ -0,0 +1,68 @@
+# Generated by Django 4.2.18 on 2026-10-18 17:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_review_stats(apps, schema_editor):
+    ReviewModel = apps.get_model("review", "ReviewModel")
+    ReviewStatsModel = apps.get_model("review", "ReviewStatsModel")
+
+    stats = {}
+    for product_id, rate in ReviewModel.objects.filter(status=2).values_list(
+        "product_id", "rate"
+    ):
+        product_stats = stats.setdefault(
+            product_id, ReviewStatsModel(product_id=product_id)
+        )
+        product_stats.total += 1
+        product_stats.rate_sum += rate
+        if 1 <= rate <= 5:
+            field = f"star_{rate}"
+            setattr(product_stats, field, getattr(product_stats, field) + 1)
+        if rate >= 4:
+            product_stats.recommend_count += 1
+    ReviewStatsModel.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0016_productmodel_final_price"),
+        ("review", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReviewStatsModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("star_1", models.PositiveIntegerField(default=0)),
+                ("star_2", models.PositiveIntegerField(default=0)),
+                ("star_3", models.PositiveIntegerField(default=0)),
+                ("star_4", models.PositiveIntegerField(default=0)),
+                ("star_5", models.PositiveIntegerField(default=0)),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("recommend_count", models.PositiveIntegerField(default=0)),
+                ("rate_sum", models.PositiveIntegerField(default=0)),
+                ("updated_date", models.DateTimeField(auto_now=True)),
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="review_stats",
+                        to="shop.productmodel",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(populate_review_stats, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,12 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import Avg
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+from shop.cache import bump_catalog_version
+from shop.surrogate import get_product_surrogate_key, purge_surrogate_keys
 
 
 class ReviewStatusType(models.IntegerChoices):
@@ -11,6 +15,45 @@ class ReviewStatusType(models.IntegerChoices):
     rejected = 3, "رد شده"
 
 
+class ReviewQuerySet(models.QuerySet):
+    def update_status(self, status):
+        """
+        Moderate reviews in bulk, adjusting stats once per product. The
+        rows are locked while read, so a concurrent moderation of the
+        same reviews waits and then sees the new status.
+        """
+        with transaction.atomic():
+            reviews = list(
+                self.select_for_update()
+                .exclude(status=status)
+                .order_by("id")
+                .values_list("id", "product_id", "rate", "status")
+            )
+            ReviewModel.objects.filter(
+                id__in=[review_id for review_id, *_ in reviews]
+            ).update(status=status)
+
+            accepted = ReviewStatusType.accepted.value
+            deltas = {}
+            for _, product_id, rate, old_status in reviews:
+                if status == accepted:
+                    sign = 1
+                elif old_status == accepted:
+                    sign = -1
+                else:
+                    continue
+                product_deltas = deltas.setdefault(product_id, {})
+                for field, delta in ReviewStatsModel.get_deltas(
+                    rate, sign
+                ).items():
+                    product_deltas[field] = (
+                        product_deltas.get(field, 0) + delta
+                    )
+            for product_id, product_deltas in sorted(deltas.items()):
+                ReviewStatsModel.apply_deltas(product_id, product_deltas)
+        return len(reviews)
+
+
 class ReviewModel(models.Model):
     user = models.ForeignKey("accounts.CustomUser", on_delete=models.CASCADE)
     product = models.ForeignKey("shop.ProductModel", on_delete=models.CASCADE)
@@ -25,12 +68,27 @@ class ReviewModel(models.Model):
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
 
+    objects = ReviewQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_date"]
 
     def __str__(self):
         return f"{self.user} - {self.product.id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_state = instance.get_stats_state()
+        return instance
+
+    def get_stats_state(self):
+        return {
+            "product_id": self.product_id,
+            "status": self.status,
+            "rate": self.rate,
+        }
+
     def get_status(self):
         return {
             "id": self.status,
@@ -39,12 +97,187 @@ class ReviewModel(models.Model):
         }
 
 
+class ReviewStatsModel(models.Model):
+    product = models.OneToOneField(
+        "shop.ProductModel",
+        on_delete=models.CASCADE,
+        related_name="review_stats",
+    )
+    star_1 = models.PositiveIntegerField(default=0)
+    star_2 = models.PositiveIntegerField(default=0)
+    star_3 = models.PositiveIntegerField(default=0)
+    star_4 = models.PositiveIntegerField(default=0)
+    star_5 = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    recommend_count = models.PositiveIntegerField(default=0)
+    rate_sum = models.PositiveIntegerField(default=0)
+
+    updated_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product_id} - {self.total}"
+
+    @classmethod
+    def get_for_product(cls, product):
+        """Stats of a product, empty ones if it has no accepted review"""
+        return cls.objects.filter(product=product).first() or cls(
+            product=product
+        )
+
+    @classmethod
+    def get_deltas(cls, rate, sign):
+        deltas = {"total": sign, "rate_sum": sign * rate}
+        if 1 <= rate <= 5:
+            deltas[f"star_{rate}"] = sign
+        if rate >= 4:
+            deltas["recommend_count"] = sign
+        return deltas
+
+    @classmethod
+    def apply_review(cls, product_id, rate, sign):
+        """Add (sign=1) or remove (sign=-1) an accepted review"""
+        return cls.apply_deltas(product_id, cls.get_deltas(rate, sign))
+
+    @classmethod
+    def apply_deltas(cls, product_id, deltas):
+        """
+        Shift the counters of a product and store the new average in
+        its avg_rate column only. Returns the new average.
+        """
+        with transaction.atomic():
+            cls.objects.get_or_create(product_id=product_id)
+            # the row lock taken here orders concurrent moderations
+            cls.objects.filter(product_id=product_id).update(
+                **{field: F(field) + delta for field, delta in deltas.items()},
+                updated_date=timezone.now(),
+            )
+            stats = cls.objects.only("rate_sum", "total").get(
+                product_id=product_id
+            )
+            average = stats.get_average()
+            cls.product.field.related_model.objects.filter(
+                pk=product_id
+            ).update(avg_rate=average)
+        # avg_rate is part of the cached listings
+        bump_catalog_version()
+        purge_surrogate_keys([get_product_surrogate_key(product_id)])
+        return average
+
+    @classmethod
+    def touch(cls, product_id):
+        """Mark the reviews of a product as changed for HTTP validators"""
+        cls.objects.filter(product_id=product_id).update(
+            updated_date=timezone.now()
+        )
+        purge_surrogate_keys([get_product_surrogate_key(product_id)])
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute the stats of every product from accepted reviews"""
+        stats = {}
+        for product_id, rate in ReviewModel.objects.filter(
+            status=ReviewStatusType.accepted.value
+        ).values_list("product_id", "rate"):
+            product_stats = stats.setdefault(
+                product_id, cls(product_id=product_id)
+            )
+            for field, delta in cls.get_deltas(rate, 1).items():
+                setattr(
+                    product_stats, field, getattr(product_stats, field) + delta
+                )
+        cls.objects.all().delete()
+        cls.objects.bulk_create(stats.values(), batch_size=1000)
+
+        product_model = cls.product.field.related_model
+        product_model.objects.exclude(id__in=list(stats)).exclude(
+            avg_rate=0
+        ).update(avg_rate=0)
+        product_model.objects.bulk_update(
+            [
+                product_model(
+                    id=product_id, avg_rate=product_stats.get_average()
+                )
+                for product_id, product_stats in stats.items()
+            ],
+            ["avg_rate"],
+            batch_size=1000,
+        )
+        return len(stats)
+
+    def get_average(self):
+        return round(self.rate_sum / self.total, 1) if self.total else 0
+
+    def get_star_counts(self):
+        return [
+            (
+                star,
+                getattr(self, f"star_{star}"),
+                (
+                    round(getattr(self, f"star_{star}") / self.total * 100)
+                    if self.total
+                    else 0
+                ),
+            )
+            for star in reversed(range(1, 6))
+        ]
+
+    def get_recommend_percentage(self):
+        return (
+            round(self.recommend_count / self.total * 100) if self.total else 0
+        )
+
+
 @receiver(post_save, sender=ReviewModel)
-def calculate_avg_review(sender, instance, created, **kwargs):
-    if instance.status == ReviewStatusType.accepted.value:
-        product = instance.product
-        average_rating = ReviewModel.objects.filter(
-            product=product, status=ReviewStatusType.accepted
-        ).aggregate(Avg("rate"))["rate__avg"]
-        product.avg_rate = round(average_rating, 1)
-        product.save()
+def update_review_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded_state = (
+        None if created else getattr(instance, "_loaded_state", None)
+    )
+    state = instance.get_stats_state()
+    accepted = ReviewStatusType.accepted.value
+    if loaded_state == state:
+        if state["status"] == accepted:
+            # the text of a published review changed
+            ReviewStatsModel.touch(state["product_id"])
+        return
+
+    if loaded_state and loaded_state["status"] == accepted:
+        average = ReviewStatsModel.apply_review(
+            loaded_state["product_id"], loaded_state["rate"], -1
+        )
+        if loaded_state["product_id"] == instance.product_id:
+            set_cached_avg_rate(instance, average)
+    if state["status"] == accepted:
+        set_cached_avg_rate(
+            instance,
+            ReviewStatsModel.apply_review(
+                state["product_id"], state["rate"], 1
+            ),
+        )
+    instance._loaded_state = state
+
+
+def set_cached_avg_rate(review, average):
+    """Keep an already loaded product in step with its avg_rate column"""
+    if ReviewModel.product.is_cached(review):
+        review.product.avg_rate = average
+
+
+@receiver(post_delete, sender=ReviewModel)
+def remove_review_stats(sender, instance, **kwargs):
+    # Stats are deleted along with the product, nothing to adjust
+    origin = kwargs.get("origin")
+    origin_model = getattr(origin, "model", None) or type(origin)
+    if origin_model is ReviewModel.product.field.related_model:
+        return
+
+    state = getattr(instance, "_loaded_state", None) or (
+        instance.get_stats_state()
+    )
+    if state["status"] == ReviewStatusType.accepted.value:
+        average = ReviewStatsModel.apply_review(
+            state["product_id"], state["rate"], -1
+        )
+        if state["product_id"] == instance.product_id:
+            set_cached_avg_rate(instance, average)
@@ -1,9 +1,12 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
 from shop.models import ProductCategoryModel, ProductModel, ProductStatusType
 
-from ..models import ReviewModel, ReviewStatusType
+from ..models import ReviewModel, ReviewStatsModel, ReviewStatusType
 
 User = get_user_model()
 
@@ -73,3 +76,125 @@ class TestReview(TestCase):
         )
 
         self.assertEqual(self.product.avg_rate, 4.5)
+
+
+class TestReviewStats(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="testuser@example.com",
+            password="test123",
+        )
+        cls.category = ProductCategoryModel.objects.create(
+            title="Category test", slug="category-test"
+        )
+        cls.product = ProductModel.objects.create(
+            user=cls.user,
+            category=cls.category,
+            title="Product test ",
+            slug="product-test",
+            description="This is description",
+            price=500,
+            status=ProductStatusType.publish.value,
+        )
+
+    def create_review(self, rate, status=ReviewStatusType.accepted.value):
+        return ReviewModel.objects.create(
+            user=self.user,
+            product=self.product,
+            description="This is a test review",
+            rate=rate,
+            status=status,
+        )
+
+    def get_stats(self):
+        return ReviewStatsModel.get_for_product(self.product)
+
+    def test_stats_follow_status_transitions(self):
+        self.create_review(5)
+        pending = self.create_review(2, ReviewStatusType.pending.value)
+        stats = self.get_stats()
+        self.assertEqual((stats.total, stats.star_5, stats.star_2), (1, 1, 0))
+
+        review = ReviewModel.objects.get(pk=pending.pk)
+        review.status = ReviewStatusType.accepted.value
+        review.save()
+        stats = self.get_stats()
+        self.assertEqual(
+            (stats.total, stats.star_2, stats.rate_sum), (2, 1, 7)
+        )
+        self.assertEqual(stats.get_recommend_percentage(), 50)
+        self.assertEqual(stats.get_average(), 3.5)
+
+        review.status = ReviewStatusType.rejected.value
+        review.save()
+        stats = self.get_stats()
+        self.assertEqual((stats.total, stats.star_2), (1, 0))
+
+    def test_stats_follow_rate_change_and_delete(self):
+        review = self.create_review(5)
+        review.rate = 3
+        review.save()
+        stats = self.get_stats()
+        self.assertEqual((stats.star_5, stats.star_3), (0, 1))
+
+        review.delete()
+        stats = self.get_stats()
+        self.assertEqual((stats.total, stats.rate_sum), (0, 0))
+        self.assertEqual(stats.get_star_counts()[0], (5, 0, 0))
+
+    def test_avg_rate_follows_rejection_without_touching_product(self):
+        updated_date = self.product.updated_date
+        self.create_review(5)
+        review = self.create_review(2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.avg_rate, 3.5)
+
+        review.status = ReviewStatusType.rejected.value
+        review.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.avg_rate, 5)
+        self.assertEqual(self.product.updated_date, updated_date)
+
+    def test_bulk_update_status(self):
+        pending = ReviewStatusType.pending.value
+        for rate in (5, 4, 3):
+            self.create_review(rate, pending)
+
+        updated = ReviewModel.objects.filter(
+            product=self.product
+        ).update_status(ReviewStatusType.accepted.value)
+        self.assertEqual(updated, 3)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.avg_rate, 4)
+        stats = self.get_stats()
+        self.assertEqual((stats.total, stats.recommend_count), (3, 2))
+        # a repeated moderation finds nothing left to count
+        self.assertEqual(
+            ReviewModel.objects.all().update_status(
+                ReviewStatusType.accepted.value
+            ),
+            0,
+        )
+        self.assertEqual(self.get_stats().total, 3)
+
+        ReviewModel.objects.filter(rate=3).update_status(
+            ReviewStatusType.rejected.value
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.avg_rate, 4.5)
+
+    def test_rebuild_review_stats_command(self):
+        self.create_review(4)
+        self.create_review(1)
+        ReviewStatsModel.objects.all().delete()
+
+        ProductModel.objects.update(avg_rate=0)
+        call_command("rebuild_review_stats", stdout=StringIO())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.avg_rate, 2.5)
+        stats = self.get_stats()
+        self.assertEqual(
+            (stats.total, stats.star_4, stats.star_1, stats.recommend_count),
+            (2, 1, 1, 1),
+        )
@@ -1,6 +1,7 @@
 import django_filters
+from django.db.models.functions import Length
 
-from shop.models import CategoryFeature
+from shop.models import CategoryFeature, ProductCategoryModel
 
 
 class CategoryFeatureFilter(django_filters.FilterSet):
@@ -16,7 +17,15 @@ class CategoryFeatureFilter(django_filters.FilterSet):
         fields = []
 
     def getting_features_based_on_category_id(self, queryset, name, value):
-        return queryset.filter(category__id=value)
+        """Features of the category and the ones it inherits, root first"""
+        category = (
+            ProductCategoryModel.objects.filter(pk=value).only("path").first()
+        )
+        if category is None:
+            return queryset.none()
+        return queryset.filter(
+            category__id__in=category.get_path_ids()
+        ).order_by(Length("category__path"), "id")
 
     def getting_the_required_features(self, queryset, name, value):
         return queryset.filter(is_required=value)
@@ -1,13 +1,229 @@
+import base64
+import json
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPaginationMixin:
+    """
+    Opt-in keyset (cursor) pagination for page number paginators.
+
+    Sending ``?pagination=cursor`` or a ``cursor`` parameter switches to
+    seeking on the active ordering of the queryset plus ``id``, so deep
+    pages cost the same as the first one and no OFFSET is used. The
+    total count is only computed when ``count=true`` is requested.
+    """
+
+    cursor_query_param = "cursor"
+    pagination_mode_query_param = "pagination"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.is_cursor_mode(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.cursor_page_size = self.get_page_size(request)
+        self.ordering = self.get_keyset_ordering(queryset)
+        self.total_items = (
+            queryset.count() if self.is_count_requested(request) else None
+        )
+
+        cursor = self.decode_cursor(request, queryset)
+        reverse = bool(cursor and cursor["reverse"])
+        ordering = [
+            self.flip(field) if reverse else field for field in self.ordering
+        ]
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(
+                self.get_seek_filter(ordering, cursor["position"])
+            )
+
+        results = list(queryset[: self.cursor_page_size + 1])
+        has_more = len(results) > self.cursor_page_size
+        results = results[: self.cursor_page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page_results = results
+        return results
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.pagination_mode_query_param)
+            == "cursor"
+            or self.cursor_query_param in request.query_params
+        )
+
+    def is_count_requested(self, request):
+        value = request.query_params.get(self.count_query_param, "")
+        return value.lower() in ("1", "true")
+
+    def get_keyset_ordering(self, queryset):
+        """Active ordering of the queryset, made unique with id"""
+        ordering = []
+        for field in (
+            queryset.query.order_by or queryset.model._meta.ordering or ()
+        ):
+            if not isinstance(field, str) or field.lstrip("-") == "?":
+                raise NotFound(self.invalid_cursor_message)
+            name = field.lstrip("-")
+            if name in ("pk", "id"):
+                ordering.append(f"{field[:-len(name)]}id")
+                return ordering
+            ordering.append(field)
+        direction = "-" if ordering and ordering[-1].startswith("-") else ""
+        ordering.append(f"{direction}id")
+        return ordering
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    def get_seek_filter(self, ordering, position):
+        """Rows strictly after position in the given ordering"""
+        conditions = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            equals = {
+                previous.lstrip("-"): value
+                for previous, value in zip(ordering[:index], position)
+            }
+            conditions.append(
+                Q(**equals, **{f"{name}__{lookup}": position[index]})
+            )
+        return reduce(lambda left, right: left | right, conditions)
+
+    def get_position(self, row):
+        position = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            if isinstance(row, dict):
+                position.append(row[name])
+                continue
+            value = row
+            for attr in name.split("__"):
+                value = getattr(value, attr)
+            position.append(value)
+        return position
+
+    def encode_cursor(self, row, reverse):
+        payload = json.dumps(
+            {
+                "o": self.ordering,
+                "p": self.get_position(row),
+                "r": reverse,
+            },
+            # str keeps microseconds of datetimes and digits of decimals
+            default=str,
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def get_ordering_field(queryset, name):
+        """Model field or annotation output field an ordering refers to"""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        model, field = queryset.model, None
+        for part in name.split("__"):
+            field = model._meta.get_field(part)
+            model = field.related_model
+        return field
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            cursor = {
+                "ordering": payload["o"],
+                "position": payload["p"],
+                "reverse": bool(payload["r"]),
+            }
+            if cursor["ordering"] != self.ordering or len(
+                cursor["position"]
+            ) != len(self.ordering):
+                raise ValueError("cursor of another ordering")
+            # the values end up in lookups, they must fit their fields
+            cursor["position"] = [
+                self.get_ordering_field(queryset, field.lstrip("-")).to_python(
+                    value
+                )
+                for field, value in zip(self.ordering, cursor["position"])
+            ]
+            if None in cursor["position"]:
+                raise ValueError("cursor position cannot be null")
+        except (
+            TypeError,
+            ValueError,
+            KeyError,
+            ValidationError,
+            FieldDoesNotExist,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def get_cursor_link(self, row, reverse):
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        url = replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(row, reverse)
+        )
+        return url
+
+    def get_next_link(self):
+        if not getattr(self, "cursor_mode", False):
+            return super().get_next_link()
+        if not self.has_next or not self.page_results:
+            return None
+        return self.get_cursor_link(self.page_results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not getattr(self, "cursor_mode", False):
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_results:
+            return None
+        return self.get_cursor_link(self.page_results[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if not getattr(self, "cursor_mode", False):
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "pagination": {
+                    "total_items": self.total_items,
+                    "page_size": self.cursor_page_size,
+                    "next": self.get_next_link(),
+                    "previous": self.get_previous_link(),
+                },
+                "results": data,
+            }
+        )
 
 
-class ProductGridPagination(PageNumberPagination):
+class ProductGridPagination(KeysetPaginationMixin, PageNumberPagination):
     page_size = 9
     page_size_query_param = "page_size"
     max_page_size = 100
 
     def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return super().get_paginated_response(data)
         return Response(
             {
                 "pagination": {
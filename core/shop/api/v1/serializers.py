@@ -1,4 +1,8 @@
+from urllib.parse import quote
+
 from django.urls import reverse
+from django.urls.resolvers import RFC3986_SUBDELIMS
+from django.utils.encoding import iri_to_uri
 from rest_framework import serializers
 
 from shop.models import (
@@ -8,6 +12,7 @@ from shop.models import (
     ProductFeature,
     ProductModel,
 )
+from shop.images import get_derivative_urls
 
 
 class ProductCategorySerializer(serializers.ModelSerializer):
@@ -46,14 +51,32 @@ class ProductFeatureSerializer(serializers.ModelSerializer):
         ref_name = "ProductFeature"
 
 
+def get_absolute_derivative_urls(request, urls):
+    if request is None:
+        return urls
+    return {
+        extension: {
+            width: request.build_absolute_uri(url)
+            for width, url in sizes.items()
+        }
+        for extension, sizes in urls.items()
+    }
+
+
 class BaseProductSerializer(serializers.ModelSerializer):
-    is_wish = serializers.BooleanField(read_only=True)
+    is_wish = serializers.BooleanField(read_only=True, default=False)
     category = ProductCategorySerializer()
     discounted_price = serializers.SerializerMethodField()
+    image_derivatives = serializers.SerializerMethodField()
 
     def get_discounted_price(self, obj):
         return obj.get_price()
 
+    def get_image_derivatives(self, obj):
+        return get_absolute_derivative_urls(
+            self.context.get("request"), obj.get_image_derivative_urls()
+        )
+
     class Meta:
         model = ProductModel
         fields = [
@@ -61,6 +84,7 @@ class BaseProductSerializer(serializers.ModelSerializer):
             "title",
             "slug",
             "image",
+            "image_derivatives",
             "brief_description",
             "price",
             "discount_percent",
@@ -88,6 +112,125 @@ class ProductListSerializer(BaseProductSerializer):
         )
 
 
+class ProductListValuesSerializer:
+    """
+    Read-only fast path of ProductListSerializer over .values() rows.
+
+    Output is identical to the DRF serializer, but URLs are built from
+    prefixes resolved once per page instead of reverse() and
+    build_absolute_uri() per row, and no nested serializer or field
+    lookup machinery runs per item.
+    """
+
+    value_fields = [
+        "id",
+        "title",
+        "slug",
+        "image",
+        "image_derivatives",
+        "brief_description",
+        "price",
+        "discount_percent",
+        "avg_rate",
+        "category_id",
+        "category__title",
+        "category__slug",
+        "created_date",
+        "updated_date",
+    ]
+    slug_placeholder = "slug-placeholder"
+
+    def __init__(self, request=None):
+        self.request = request
+        fields = ProductListSerializer(context={"request": request}).fields
+        self.price_field = fields["price"]
+        self.created_date_field = fields["created_date"]
+        self.updated_date_field = fields["updated_date"]
+        self.image_storage = ProductModel._meta.get_field("image").storage
+
+        self.detail_url_parts = None
+        if request is not None:
+            self.scheme_host = request.build_absolute_uri("/")[:-1]
+            detail_url = self.get_absolute_url(
+                reverse(
+                    "shop:api-v1:product-detail",
+                    kwargs={"slug": self.slug_placeholder},
+                )
+            )
+            self.detail_url_parts = detail_url.split(self.slug_placeholder)
+
+    def get_absolute_url(self, url):
+        """request.build_absolute_uri() for the common root relative case"""
+        if self.request is None:
+            return url
+        if (
+            url.startswith("/")
+            and not url.startswith("//")
+            and "/./" not in url
+            and "/../" not in url
+        ):
+            return iri_to_uri(self.scheme_host + url)
+        return self.request.build_absolute_uri(url)
+
+    def get_image_url(self, name):
+        if not name:
+            return None
+        return self.get_absolute_url(self.image_storage.url(name))
+
+    def get_image_derivatives(self, row):
+        return {
+            extension: {
+                width: self.get_absolute_url(url)
+                for width, url in sizes.items()
+            }
+            for extension, sizes in get_derivative_urls(
+                row["image_derivatives"], row["image"]
+            ).items()
+        }
+
+    def get_detail_url(self, slug):
+        if self.detail_url_parts is None:
+            return None
+        prefix, suffix = self.detail_url_parts
+        # the quoting reverse() applies to arguments
+        return prefix + quote(slug, safe=RFC3986_SUBDELIMS + "/~:@") + suffix
+
+    def to_representation(self, row):
+        brief_description = row["brief_description"]
+        return {
+            "id": int(row["id"]),
+            "title": str(row["title"]),
+            "slug": str(row["slug"]),
+            "image": self.get_image_url(row["image"]),
+            "image_derivatives": self.get_image_derivatives(row),
+            "brief_description": (
+                None if brief_description is None else str(brief_description)
+            ),
+            "price": self.price_field.to_representation(row["price"]),
+            "discount_percent": int(row["discount_percent"]),
+            "discounted_price": ProductModel.calculate_price(
+                row["price"], row["discount_percent"]
+            ),
+            "avg_rate": float(row["avg_rate"]),
+            "category": {
+                "id": int(row["category_id"]),
+                "title": str(row["category__title"]),
+                "slug": str(row["category__slug"]),
+            },
+            "is_wish": bool(row.get("is_wish", False)),
+            "created_date": self.created_date_field.to_representation(
+                row["created_date"]
+            ),
+            "updated_date": self.updated_date_field.to_representation(
+                row["updated_date"]
+            ),
+            "detail_url": self.get_detail_url(row["slug"]),
+        }
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
 class ProductDetailSerializer(BaseProductSerializer):
     features = ProductFeatureSerializer(many=True, source="features.all")
 
@@ -99,6 +242,29 @@ class AddOrRemoveWishlistSerializer(serializers.Serializer):
     product_id = serializers.IntegerField()
 
 
+class WishlistCheckSerializer(serializers.Serializer):
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        try:
+            ids = {
+                int(product_id)
+                for product_id in value.split(",")
+                if product_id
+            }
+        except ValueError:
+            raise serializers.ValidationError(
+                "ids must be comma separated integers"
+            )
+        if len(ids) > 100:
+            raise serializers.ValidationError("at most 100 ids can be checked")
+        return ids
+
+
+class PersonalizationSerializer(WishlistCheckSerializer):
+    ids = serializers.CharField(required=False, allow_blank=True, default="")
+
+
 class CategoryNodeSerializer(serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
 
@@ -138,6 +304,7 @@ class MinPriceSerializer(serializers.Serializer):
 class PopularProductSerializer(serializers.ModelSerializer):
     discounted_price = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
+    image_derivatives = serializers.SerializerMethodField()
     category_name = serializers.CharField(source="category.title")
 
     class Meta:
@@ -148,6 +315,7 @@ class PopularProductSerializer(serializers.ModelSerializer):
             "category_name",
             "slug",
             "image_url",
+            "image_derivatives",
             "price",
             "discount_percent",
             "discounted_price",
@@ -159,3 +327,8 @@ class PopularProductSerializer(serializers.ModelSerializer):
     def get_image_url(self, obj):
         request = self.context.get("request")
         return request.build_absolute_uri(obj.image.url) if obj.image else None
+
+    def get_image_derivatives(self, obj):
+        return get_absolute_derivative_urls(
+            self.context.get("request"), obj.get_image_derivative_urls()
+        )
@@ -11,11 +11,31 @@ urlpatterns = [
         name="category-feature-list",
     ),
     path("product/grid/", views.ProductGridAPI.as_view(), name="product-grid"),
+    path(
+        "product/grid/facets/",
+        views.ProductFacetCountAPI.as_view(),
+        name="product-grid-facets",
+    ),
     re_path(
         r"product/(?P<slug>[-\w]+)/detail/",
         views.ProductDetailAPI.as_view(),
         name="product-detail",
     ),
+    re_path(
+        r"product/(?P<slug>[-\w]+)/similar/",
+        views.SimilarProductsAPI.as_view(),
+        name="product-similar",
+    ),
+    path(
+        "wishlist/check/",
+        views.WishlistCheckAPI.as_view(),
+        name="wishlist-check",
+    ),
+    path(
+        "personalization/",
+        views.PersonalizationAPI.as_view(),
+        name="personalization",
+    ),
     path(
         "add-or-remove-wishlist/",
         views.AddOrRemoveWishlistAPI.as_view(),
@@ -1,13 +1,8 @@
 from django.core.cache import cache
-from django.db.models import (
-    BooleanField,
-    Count,
-    Exists,
-    Min,
-    OuterRef,
-    Prefetch,
-    Q,
-)
+from django.middleware.csrf import get_token
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import condition
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 from rest_framework.generics import (
@@ -19,16 +14,45 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from cart.cart import CartSession
 from review.api.v1.serializers import ReviewSerializer
-from review.models import ReviewModel, ReviewStatusType
+from review.models import ReviewModel, ReviewStatsModel, ReviewStatusType
+from shop.cache import (
+    FEATURE_SCHEMA_CACHE_TIMEOUT,
+    GRID_PAGE_CACHE_TIMEOUT,
+    get_catalog_cache_key,
+    get_feature_schema_cache_key,
+)
+from shop.conditional import (
+    get_catalog_etag,
+    get_feature_schema_etag,
+    get_product_etag,
+    get_product_last_modified,
+)
+from shop.facets import (
+    filter_products,
+    get_facet_counts,
+    get_filter_signature,
+    get_product_ordering,
+)
 from shop.models import (
     CategoryFeature,
     ProductCategoryModel,
-    ProductFeature,
     ProductModel,
     ProductStatusType,
     WishlistProductModel,
 )
+from shop.prices import get_category_price_summary
+from shop.recommendations import SIMILAR_PRODUCTS_LIMIT, get_similar_products
+from shop.surrogate import (
+    CATALOG_SURROGATE_KEY,
+    SIMILAR_PRODUCTS_SURROGATE_KEY,
+    SurrogateKeyMixin,
+    get_category_surrogate_key,
+    get_product_surrogate_key,
+    get_product_surrogate_keys,
+)
+from shop.wishlist import get_wished_ids, get_wishlist_ids
 
 from .filters import CategoryFeatureFilter
 from .pagination import ProductGridPagination
@@ -37,94 +61,97 @@ from .serializers import (
     CategoryFeatureSerializer,
     CategoryTreeSerializer,
     MinPriceSerializer,
+    PersonalizationSerializer,
     PopularProductSerializer,
     ProductDetailSerializer,
     ProductListSerializer,
+    ProductListValuesSerializer,
+    WishlistCheckSerializer,
 )
 
 
-class CategoryFeatureAPI(ListAPIView):
+@method_decorator(condition(etag_func=get_feature_schema_etag), name="get")
+class CategoryFeatureAPI(SurrogateKeyMixin, ListAPIView):
     permission_classes = [AllowAny]
-    queryset = CategoryFeature.objects.all()
+    queryset = CategoryFeature.objects.prefetch_related("options")
     serializer_class = CategoryFeatureSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = CategoryFeatureFilter
 
+    def list(self, request, *args, **kwargs):
+        cache_key = get_feature_schema_cache_key(
+            "category_feature_api",
+            get_filter_signature(request.query_params, ignore=()),
+        )
+        data = cache.get(cache_key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(cache_key, data, FEATURE_SCHEMA_CACHE_TIMEOUT)
+        return Response(data)
+
 
-class ProductGridAPI(ListAPIView):
+class ProductGridAPI(SurrogateKeyMixin, ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = ProductListSerializer
     pagination_class = ProductGridPagination
 
+    def get_surrogate_keys(self, response):
+        return [
+            CATALOG_SURROGATE_KEY,
+            *get_product_surrogate_keys(
+                item["id"] for item in response.data["results"]
+            ),
+        ]
+
     def get_queryset(self):
-        queryset = (
-            ProductModel.objects.filter(status=ProductStatusType.publish.value)
-            .select_related("category")
-            .prefetch_related(
-                Prefetch(
-                    "features",
-                    queryset=ProductFeature.objects.select_related(
-                        "feature", "option"
-                    ),
-                )
-            )
+        queryset = ProductModel.objects.filter(
+            status=ProductStatusType.publish.value
         )
-        queryset = self.apply_filters(queryset)
-
-        wishlist_subquery = WishlistProductModel.objects.filter(
-            product_id=OuterRef("pk"),
-            user_id=(
-                self.request.user.id
-                if self.request.user.is_authenticated
-                else None
-            ),
+        return self.apply_filters(queryset)
+
+    def list(self, request, *args, **kwargs):
+        # Pages are shared by all users, is_wish is overlaid per request
+        cache_key = get_catalog_cache_key(
+            "product_grid_api",
+            request.build_absolute_uri("/"),
+            get_filter_signature(request.query_params, ignore=()),
         )
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.serialize_page()
+            cache.set(cache_key, data, GRID_PAGE_CACHE_TIMEOUT)
+        return Response(self.overlay_wishlist(data))
+
+    def serialize_page(self):
+        """Page of the grid through the values() based serializer"""
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = ProductListValuesSerializer.value_fields
+        # the keyset paginator reads the ordering columns from the rows
+        ordering = [
+            field.lstrip("-")
+            for field in queryset.query.order_by or ProductModel._meta.ordering
+            if isinstance(field, str)
+            and field.lstrip("-") not in (*fields, "?")
+        ]
+        page = self.paginate_queryset(queryset.values(*fields, *ordering))
+        results = ProductListValuesSerializer(self.request).serialize(page)
+        return self.get_paginated_response(results).data
 
-        queryset = queryset.annotate(
-            is_wish=Exists(wishlist_subquery, output_field=BooleanField())
+    def overlay_wishlist(self, data):
+        wished_ids = get_wished_ids(
+            self.request.user, [item["id"] for item in data["results"]]
         )
-
-        return queryset
+        results = [
+            {**item, "is_wish": item["id"] in wished_ids}
+            for item in data["results"]
+        ]
+        return {**data, "results": results}
 
     def apply_filters(self, queryset):
-        if category_id := self.request.query_params.get("category_id"):
-            category = ProductCategoryModel.objects.filter(
-                id=category_id
-            ).first()
-            if category:
-                if category.parent is None:
-                    queryset = queryset.filter(
-                        category__in=category.get_all_subcategories()
-                    )
-                else:
-                    queryset = queryset.filter(category=category)
-
-        if q := self.request.query_params.get("q"):
-            queryset = queryset.filter(title__icontains=q)
-
-        if min_price := self.request.query_params.get("min_price"):
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price := self.request.query_params.get("max_price"):
-            queryset = queryset.filter(price__lte=max_price)
-
-        for key, values in self.request.query_params.lists():
-            if key.startswith("feature_"):
-                feature_id = key.split("_")[1]
-                values = [v for v in values if v.strip()]
-
-                if not values:
-                    continue
-
-                subquery = ProductFeature.objects.filter(
-                    product_id=OuterRef("id"), feature_id=feature_id
-                ).filter(Q(option__value__in=values) | Q(value__in=values))
-
-                queryset = queryset.annotate(
-                    **{f"has_feature_{feature_id}": Exists(subquery)}
-                ).filter(**{f"has_feature_{feature_id}": True})
+        queryset = filter_products(queryset, self.request.query_params)
 
         if order_by := self.request.query_params.get("order_by"):
-            queryset = queryset.order_by(order_by)
+            queryset = queryset.order_by(get_product_ordering(order_by))
 
         return queryset
 
@@ -134,7 +161,34 @@ class ProductGridAPI(ListAPIView):
         return context
 
 
-class ProductDetailAPI(RetrieveAPIView):
+class ProductFacetCountAPI(SurrogateKeyMixin, APIView):
+    permission_classes = [AllowAny]
+    cache_timeout = 60 * 15
+
+    def get(self, request):
+        cache_key = get_catalog_cache_key(
+            "product_facet_counts", get_filter_signature(request.query_params)
+        )
+        facet_counts = cache.get(cache_key)
+        if facet_counts is None:
+            facet_counts = get_facet_counts(
+                ProductModel.objects.filter(
+                    status=ProductStatusType.publish.value
+                ),
+                request.query_params,
+            )
+            cache.set(cache_key, facet_counts, self.cache_timeout)
+        return Response(facet_counts)
+
+
+@method_decorator(
+    condition(
+        etag_func=get_product_etag,
+        last_modified_func=get_product_last_modified,
+    ),
+    name="get",
+)
+class ProductDetailAPI(SurrogateKeyMixin, RetrieveAPIView):
     permission_classes = [AllowAny]
     queryset = ProductModel.objects.filter(
         status=ProductStatusType.publish.value
@@ -143,59 +197,96 @@ class ProductDetailAPI(RetrieveAPIView):
     lookup_field = "slug"
     lookup_url_kwarg = "slug"
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-
-        wishlist_subquery = WishlistProductModel.objects.filter(
-            product_id=OuterRef("pk"),
-            user_id=(
-                self.request.user.id
-                if self.request.user.is_authenticated
-                else None
-            ),
+    def get_surrogate_keys(self, response):
+        return [
+            get_product_surrogate_key(self.product.id),
+            get_category_surrogate_key(self.product.category_id),
+        ]
+
+    def retrieve(self, request, *args, **kwargs):
+        product = self.product = self.get_object()
+        product.is_wish = product.id in get_wishlist_ids(request.user)
+        data = self.get_serializer(product).data
+
+        reviews = ReviewModel.objects.filter(
+            product=product, status=ReviewStatusType.accepted.value
         )
+        data["reviews"] = ReviewSerializer(reviews, many=True).data
+
+        review_stats = ReviewStatsModel.get_for_product(product)
+        data["star_counts"] = review_stats.get_star_counts()
+        data["recommend_percentage"] = review_stats.get_recommend_percentage()
+
+        return Response(data)
 
-        queryset = queryset.annotate(
-            is_wish=Exists(wishlist_subquery, output_field=BooleanField())
+
+class SimilarProductsAPI(SurrogateKeyMixin, GenericAPIView):
+    permission_classes = [AllowAny]
+    queryset = ProductModel.objects.filter(
+        status=ProductStatusType.publish.value
+    )
+    serializer_class = ProductListSerializer
+    lookup_field = "slug"
+    lookup_url_kwarg = "slug"
+
+    def get_surrogate_keys(self, response):
+        # the cards show prices and rates, so any catalog change counts
+        return [
+            CATALOG_SURROGATE_KEY,
+            SIMILAR_PRODUCTS_SURROGATE_KEY,
+            get_product_surrogate_key(self.product.id),
+        ]
+
+    def get(self, request, *args, **kwargs):
+        self.product = self.get_object()
+        products = get_similar_products(
+            self.product, limit=SIMILAR_PRODUCTS_LIMIT
         )
+        wished_ids = get_wishlist_ids(request.user)
+        for product in products:
+            product.is_wish = product.id in wished_ids
+        return Response(self.get_serializer(products, many=True).data)
 
-        return queryset
 
-    def retrieve(self, request, *args, **kwargs):
-        response = super().retrieve(request, *args, **kwargs)
-        reviews = ReviewModel.objects.filter(
-            product=self.get_object(), status=ReviewStatusType.accepted.value
+class WishlistCheckAPI(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        serializer = WishlistCheckSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        wished_ids = get_wished_ids(
+            request.user, serializer.validated_data["ids"]
         )
-        response.data["reviews"] = ReviewSerializer(reviews, many=True).data
+        return Response({"wished_ids": sorted(wished_ids)})
 
-        total_reviews = reviews.count()
-        star_counts = reviews.aggregate(
-            **{
-                f"star{star}": Count("pk", filter=Q(rate=star))
-                for star in range(1, 6)
-            }
+
+class PersonalizationAPI(APIView):
+    """
+    Per-user parts of the shared catalog pages, fetched by them so the
+    pages themselves stay cacheable at the edge.
+    """
+
+    permission_classes = [AllowAny]
+
+    @method_decorator(never_cache)
+    def get(self, request):
+        serializer = PersonalizationSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        wished_ids = get_wished_ids(
+            request.user, serializer.validated_data["ids"]
         )
-        response.data["star_counts"] = [
-            (
-                star,
-                star_counts[f"star{star}"],
-                (
-                    round((star_counts[f"star{star}"] / total_reviews * 100))
-                    if total_reviews
-                    else 0
-                ),
-            )
-            for star in reversed(range(1, 6))
-        ]
-        recommend_count = reviews.filter(rate__gte=4).count()
-        response.data["recommend_percentage"] = (
-            round((recommend_count / total_reviews) * 100)
-            if total_reviews
-            else 0
+        return Response(
+            {
+                "is_authenticated": request.user.is_authenticated,
+                "cart_total_quantity": CartSession(
+                    request.session
+                ).get_total_quantity(),
+                "wished_ids": sorted(wished_ids),
+                # also sets the csrftoken cookie the page scripts read
+                "csrf_token": get_token(request),
+            }
         )
 
-        return response
-
 
 class AddOrRemoveWishlistAPI(GenericAPIView):
     permission_classes = [IsAuthenticated]
@@ -241,9 +332,11 @@ class AddOrRemoveWishlistAPI(GenericAPIView):
         )
 
 
-class CategoriesSidebarAPI(APIView):
+class CategoriesSidebarAPI(SurrogateKeyMixin, APIView):
+    @method_decorator(condition(etag_func=get_catalog_etag))
     def get(self, request):
-        category_tree = cache.get("category_tree_data")
+        category_tree_key = get_catalog_cache_key("category_tree_data")
+        category_tree = cache.get(category_tree_key)
         if not category_tree:
             root_categories = ProductCategoryModel.objects.filter(
                 parent__isnull=True
@@ -253,12 +346,9 @@ class CategoriesSidebarAPI(APIView):
                 root_categories, many=True, context={"request": request}
             )
             category_tree = serializer.data
-            cache.set("category_tree_data", category_tree, 60 * 60 * 24 * 7)
+            cache.set(category_tree_key, category_tree, 60 * 60 * 24 * 7)
 
-        min_prices = cache.get("min_prices_data")
-        if not min_prices:
-            min_prices = self.get_min_prices()
-            cache.set("min_prices_data", min_prices, 60 * 60 * 24 * 7)
+        min_prices = self.get_min_prices()
 
         popular_products = self.get_popular_products(request)
 
@@ -271,6 +361,7 @@ class CategoriesSidebarAPI(APIView):
         )
 
     def get_min_prices(self):
+        price_summary = get_category_price_summary()
         categories = ProductCategoryModel.objects.filter(
             slug__in=[
                 "mobile-phones",
@@ -282,12 +373,13 @@ class CategoriesSidebarAPI(APIView):
 
         min_prices = []
         for category in categories:
-            min_price = self.get_category_min_price(category)
-
             min_prices.append(
                 {
                     "category_id": category.id,
-                    "min_price": min_price,
+                    "min_price": price_summary.get(category.id, {}).get(
+                        "min_price"
+                    )
+                    or 0,
                     "category_slug": category.slug,
                     "category_title": category.title,
                 }
@@ -295,18 +387,6 @@ class CategoriesSidebarAPI(APIView):
 
         return MinPriceSerializer(min_prices, many=True).data
 
-    def get_category_min_price(self, category):
-        all_categories = [category] + list(category.get_all_subcategories())
-        category_ids = [c.id for c in all_categories]
-
-        return (
-            ProductModel.objects.filter(
-                category_id__in=category_ids,
-                status=ProductStatusType.publish.value,
-            ).aggregate(min_price=Min("price"))["min_price"]
-            or 0
-        )
-
     def get_popular_products(self, request):
         products = (
             ProductModel.objects.select_related("category")
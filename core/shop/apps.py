@@ -6,4 +6,4 @@ class ShopConfig(AppConfig):
     name = "shop"
 
     def ready(self):
-        pass
+        from . import signals  # noqa: F401
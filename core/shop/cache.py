@@ -0,0 +1,89 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .surrogate import CATALOG_SURROGATE_KEY, purge_surrogate_keys
+
+CATALOG_VERSION_KEY = "catalog_version"
+FEATURE_SCHEMA_VERSION_KEY = "feature_schema_version"
+FEATURE_SCHEMA_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+CATEGORY_PRICE_SUMMARY_KEY = "category_price_summary"
+CATEGORY_PRICE_SUMMARY_VERSION_KEY = "category_price_summary_version"
+GRID_PAGE_CACHE_TIMEOUT = 60 * 15
+
+
+def _new_version():
+    # Milliseconds keep a version lost to eviction from being reused
+    return int(time.time() * 1000)
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def get_catalog_version():
+    """Current version of the catalog, part of every listing cache key"""
+    return _get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """
+    Invalidate every cached listing by moving to a new version once the
+    current transaction commits, a listing built from rows read before
+    then must not be cached under the new version.
+    """
+    transaction.on_commit(lambda: _bump_version(CATALOG_VERSION_KEY))
+    purge_surrogate_keys([CATALOG_SURROGATE_KEY])
+
+
+def get_catalog_cache_key(prefix, *parts):
+    return ":".join(
+        [prefix, str(get_catalog_version()), *(str(part) for part in parts)]
+    )
+
+
+def get_feature_schema_version():
+    """
+    Version of the category tree and its features, which change far
+    less often than the products the catalog version also follows.
+    """
+    return _get_version(FEATURE_SCHEMA_VERSION_KEY)
+
+
+def bump_feature_schema_version():
+    transaction.on_commit(lambda: _bump_version(FEATURE_SCHEMA_VERSION_KEY))
+
+
+def get_feature_schema_cache_key(prefix, *parts):
+    return ":".join(
+        [
+            prefix,
+            str(get_feature_schema_version()),
+            *(str(part) for part in parts),
+        ]
+    )
+
+
+def get_category_price_summary_cache_key():
+    return ":".join(
+        [
+            CATEGORY_PRICE_SUMMARY_KEY,
+            str(_get_version(CATEGORY_PRICE_SUMMARY_VERSION_KEY)),
+        ]
+    )
+
+
+def bump_category_price_summary_version():
+    _bump_version(CATEGORY_PRICE_SUMMARY_VERSION_KEY)
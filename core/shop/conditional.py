@@ -0,0 +1,108 @@
+import hashlib
+import json
+
+from django.contrib.messages import get_messages
+
+from cart.cart import CartSession
+
+from .cache import get_catalog_version, get_feature_schema_version
+from .models import ProductModel, ProductStatusType
+from .wishlist import get_wishlist_ids
+
+
+def make_etag(*parts):
+    return hashlib.md5(":".join(map(str, parts)).encode()).hexdigest()
+
+
+def get_product_versions(request, slug):
+    """
+    Id and update dates of a product and of its review stats, fetched
+    once per request and shared by the ETag and Last-Modified checks.
+    """
+    versions = request.__dict__.setdefault("_product_versions", {})
+    if slug not in versions:
+        versions[slug] = (
+            ProductModel.objects.filter(slug=slug)
+            .values(
+                "id", "status", "updated_date", "review_stats__updated_date"
+            )
+            .first()
+        )
+    return versions[slug]
+
+
+def get_published_product_versions(request, slug):
+    versions = get_product_versions(request, slug)
+    if versions and versions["status"] == ProductStatusType.publish.value:
+        return versions
+    return None
+
+
+def get_product_last_modified(request, slug, **kwargs):
+    """Only for anonymous users, others also see their wishlist state"""
+    if request.user.is_authenticated:
+        return None
+    versions = get_published_product_versions(request, slug)
+    if versions is None:
+        return None
+    return max(
+        date
+        for date in (
+            versions["updated_date"],
+            versions["review_stats__updated_date"],
+        )
+        if date
+    )
+
+
+def get_product_etag(request, slug, **kwargs):
+    """ETag of a published product as the product API renders it"""
+    versions = get_published_product_versions(request, slug)
+    if versions is None:
+        return None
+    return make_etag(
+        "product",
+        versions["id"],
+        versions["updated_date"].isoformat(),
+        versions["review_stats__updated_date"],
+        get_catalog_version(),
+        versions["id"] in get_wishlist_ids(request.user),
+    )
+
+
+def get_product_page_etag(request, slug, **kwargs):
+    """
+    ETag of the product page, which also shows the user's menu, cart
+    and wishlist. Pages with pending messages are always rendered.
+    """
+    versions = get_product_versions(request, slug)
+    if versions is None or len(get_messages(request)):
+        return None
+    return make_etag(
+        "product_page",
+        versions["id"],
+        versions["updated_date"].isoformat(),
+        versions["review_stats__updated_date"],
+        get_catalog_version(),
+        request.user.pk,
+        sorted(get_wishlist_ids(request.user)),
+        json.dumps(
+            CartSession(request.session).get_cart_dict(), sort_keys=True
+        ),
+    )
+
+
+def get_catalog_etag(request, *args, **kwargs):
+    """ETag of responses built from the catalog only"""
+    return make_etag(
+        "catalog", get_catalog_version(), request.build_absolute_uri()
+    )
+
+
+def get_feature_schema_etag(request, *args, **kwargs):
+    """ETag of responses built from the categories and features only"""
+    return make_etag(
+        "feature_schema",
+        get_feature_schema_version(),
+        request.build_absolute_uri(),
+    )
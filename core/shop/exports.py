@@ -0,0 +1,151 @@
+import csv
+import json
+
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import (
+    CategoryFeature,
+    ProductCategoryModel,
+    ProductFeature,
+    ProductStatusType,
+)
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+# Same columns import_products reads, plus computed ones
+EXPORT_FIELDS = [
+    "id",
+    "title",
+    "slug",
+    "category",
+    "category_path",
+    "price",
+    "discount_percent",
+    "final_price",
+    "stock",
+    "status",
+    "avg_rate",
+    "brief_description",
+    "image",
+    "created_date",
+]
+FEATURE_COLUMN_PREFIX = "feature:"
+
+
+class Echo:
+    """File-like object handing csv writer output straight back"""
+
+    def write(self, value):
+        return value
+
+
+def get_category_paths():
+    """Category titles from the root, joined, as {category_id: path}"""
+    categories = {
+        pk: (title, path)
+        for pk, title, path in ProductCategoryModel.objects.values_list(
+            "id", "title", "path"
+        )
+    }
+    return {
+        pk: " / ".join(
+            categories[int(ancestor)][0]
+            for ancestor in path.strip("/").split("/")
+            if ancestor and int(ancestor) in categories
+        )
+        or title
+        for pk, (title, path) in categories.items()
+    }
+
+
+def iter_product_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Export rows of the products, read through a server-side cursor so
+    memory stays flat however large the catalog is.
+    """
+    category_paths = get_category_paths()
+    products = (
+        queryset.select_related("category")
+        .prefetch_related(
+            Prefetch(
+                "features",
+                queryset=ProductFeature.objects.select_related(
+                    "feature", "option"
+                ),
+            )
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for product in products:
+        yield {
+            "id": product.id,
+            "title": product.title,
+            "slug": product.slug,
+            "category": product.category.slug,
+            "category_path": category_paths.get(product.category_id, ""),
+            "price": product.price,
+            "discount_percent": product.discount_percent,
+            "final_price": product.final_price,
+            "stock": product.stock,
+            "status": ProductStatusType(product.status).name,
+            "avg_rate": product.avg_rate,
+            "brief_description": product.brief_description or "",
+            "image": product.image.name,
+            "created_date": product.created_date.isoformat(),
+            "features": {
+                product_feature.feature.name: (
+                    product_feature.option.value
+                    if product_feature.option
+                    else product_feature.value
+                )
+                for product_feature in product.features.all()
+            },
+        }
+
+
+def iter_csv(rows):
+    feature_names = list(
+        CategoryFeature.objects.order_by("name")
+        .values_list("name", flat=True)
+        .distinct()
+    )
+    writer = csv.DictWriter(
+        Echo(),
+        EXPORT_FIELDS
+        + [f"{FEATURE_COLUMN_PREFIX}{name}" for name in feature_names],
+    )
+    # BOM so spreadsheet apps read the Persian text as UTF-8
+    yield "\ufeff" + writer.writeheader()
+    for row in rows:
+        features = row.pop("features")
+        row.update(
+            {
+                f"{FEATURE_COLUMN_PREFIX}{name}": value
+                for name, value in features.items()
+            }
+        )
+        yield writer.writerow(row)
+
+
+def iter_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+
+
+def get_export_response(queryset, export_format):
+    """Stream the products of queryset as a csv or jsonl attachment"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format {export_format!r}")
+    rows = iter_product_rows(queryset)
+    content = iter_csv(rows) if export_format == "csv" else iter_jsonl(rows)
+    response = StreamingHttpResponse(
+        content, content_type=EXPORT_FORMATS[export_format]
+    )
+    filename = f"products-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,289 @@
+import hashlib
+import json
+
+from django.db.models import Count, Max, Min, Q
+
+from .models import (
+    FeatureOption,
+    ProductCategoryModel,
+    ProductFacetModel,
+    ProductFeature,
+)
+from .search import search_products
+
+PRICE_BUCKET_EDGES = (0, 100000, 500000, 1000000, 5000000, 10000000)
+# price sorting follows what customers pay, not the list price
+ORDERING_ALIASES = {"price": "final_price", "-price": "-final_price"}
+
+
+def normalize_facet_value(value):
+    """Normalize a feature value for exact matching in the facet index"""
+    return " ".join(str(value).split()).casefold()
+
+
+def get_facet_values(product_feature):
+    """Normalized values a product feature can be filtered by"""
+    values = [product_feature.value]
+    if product_feature.option_id:
+        values.append(product_feature.option.value)
+    normalized = {normalize_facet_value(value) for value in values if value}
+    normalized.discard("")
+    return normalized
+
+
+def index_product_features(product_features):
+    """Replace the facet rows of the given product features"""
+    product_features = list(product_features)
+    ProductFacetModel.objects.filter(
+        product_feature__in=product_features
+    ).delete()
+    ProductFacetModel.objects.bulk_create(
+        [
+            ProductFacetModel(
+                product_feature=product_feature,
+                product_id=product_feature.product_id,
+                feature_id=product_feature.feature_id,
+                value=value,
+            )
+            for product_feature in product_features
+            for value in get_facet_values(product_feature)
+        ],
+        batch_size=1000,
+    )
+
+
+def reindex_option(option):
+    """Refresh the facet rows of every product feature using an option"""
+    index_product_features(
+        ProductFeature.objects.filter(option=option).select_related("option")
+    )
+
+
+def parse_feature_filters(params):
+    """Collect the feature_<id> query params as {feature_id: values}"""
+    feature_filters = {}
+    for key, values in params.lists():
+        if not key.startswith("feature_"):
+            continue
+        feature_id = key.split("_")[1]
+        if not feature_id.isdigit():
+            continue
+        values = {normalize_facet_value(v) for v in values if v.strip()}
+        if values:
+            feature_filters[int(feature_id)] = values
+    return feature_filters
+
+
+def get_feature_postings(feature_filters):
+    """Product ids matching each requested feature filter, in one query"""
+    condition = Q()
+    for feature_id, values in feature_filters.items():
+        condition |= Q(feature_id=feature_id, value__in=values)
+
+    postings = {feature_id: set() for feature_id in feature_filters}
+    for feature_id, product_id in ProductFacetModel.objects.filter(
+        condition
+    ).values_list("feature_id", "product_id"):
+        postings[feature_id].add(product_id)
+    return postings
+
+
+def intersect_postings(postings):
+    """Product ids found in every posting list, smallest lists first"""
+    posting_lists = sorted(postings, key=len)
+    product_ids = posting_lists[0]
+    for posting_list in posting_lists[1:]:
+        if not product_ids:
+            break
+        product_ids = product_ids & posting_list
+    return product_ids
+
+
+def get_product_ids_by_features(feature_filters):
+    """Intersect the posting lists of all requested feature filters"""
+    return intersect_postings(get_feature_postings(feature_filters).values())
+
+
+def filter_products(queryset, params, exclude=(), exclude_features=()):
+    """
+    Apply the product grid filters (category_id, q, min_price/max_price and
+    feature_<id>) found in params. Filters named in exclude, and feature
+    ids in exclude_features, are skipped so facet counts can drop the
+    filter they are counting.
+    """
+    if "category" not in exclude and (
+        category_id := params.get("category_id")
+    ):
+        category = ProductCategoryModel.objects.filter(id=category_id).first()
+        if category:
+            queryset = queryset.filter(
+                category__path__startswith=category.path
+            )
+
+    if "q" not in exclude and (q := params.get("q")):
+        queryset = search_products(queryset, q)
+
+    if "price" not in exclude:
+        if min_price := params.get("min_price"):
+            queryset = queryset.filter(final_price__gte=min_price)
+        if max_price := params.get("max_price"):
+            queryset = queryset.filter(final_price__lte=max_price)
+
+    feature_filters = {
+        feature_id: values
+        for feature_id, values in parse_feature_filters(params).items()
+        if feature_id not in exclude_features
+    }
+    if feature_filters:
+        queryset = queryset.filter(
+            id__in=get_product_ids_by_features(feature_filters)
+        )
+    return queryset
+
+
+def get_product_ordering(order_by):
+    return ORDERING_ALIASES.get(order_by, order_by)
+
+
+def get_filter_signature(params, ignore=("page", "page_size", "order_by")):
+    """Stable hash of the filter state, independent of param order"""
+    state = sorted(
+        (key, sorted(v for v in values if v.strip()))
+        for key, values in params.lists()
+        if key not in ignore
+    )
+    state = [(key, values) for key, values in state if values]
+    return hashlib.md5(json.dumps(state).encode()).hexdigest()
+
+
+def get_option_counts(queryset, params):
+    """Product counts per feature value, one entry per feature"""
+    feature_filters = parse_feature_filters(params)
+    products = filter_products(
+        queryset, params, exclude_features=feature_filters
+    )
+    postings = get_feature_postings(feature_filters) if feature_filters else {}
+
+    def matching(feature_ids):
+        """Filtered products that pass the filters of feature_ids"""
+        if not feature_ids:
+            return products
+        return products.filter(
+            id__in=intersect_postings(
+                postings[feature_id] for feature_id in feature_ids
+            )
+        )
+
+    # A feature's own filter is dropped while counting its options, so the
+    # sibling options of a selected value stay selectable. Every feature
+    # gets its own product set, all of them counted in one grouped query.
+    condition = Q(product__in=matching(list(feature_filters))) & ~Q(
+        feature_id__in=feature_filters
+    )
+    for feature_id in feature_filters:
+        condition |= Q(
+            feature_id=feature_id,
+            product__in=matching(
+                [other for other in feature_filters if other != feature_id]
+            ),
+        )
+    rows = list(
+        ProductFacetModel.objects.filter(condition)
+        .values("feature_id", "value")
+        .annotate(count=Count("product_id", distinct=True))
+        .order_by()
+    )
+
+    labels = {
+        (feature_id, normalize_facet_value(value)): value
+        for feature_id, value in FeatureOption.objects.filter(
+            feature_id__in={row["feature_id"] for row in rows}
+        ).values_list("feature_id", "value")
+    }
+    features = {}
+    for row in rows:
+        features.setdefault(row["feature_id"], []).append(
+            {
+                "value": row["value"],
+                "label": labels.get(
+                    (row["feature_id"], row["value"]), row["value"]
+                ),
+                "count": row["count"],
+            }
+        )
+    return [
+        {
+            "feature_id": feature_id,
+            "options": sorted(options, key=lambda option: option["value"]),
+        }
+        for feature_id, options in sorted(features.items())
+    ]
+
+
+def get_price_buckets(queryset, params):
+    """Product counts per price range, plus the total under all filters"""
+    edges = list(PRICE_BUCKET_EDGES)
+    ranges = list(zip(edges, edges[1:] + [None]))
+    aggregates = {
+        f"bucket_{index}": Count(
+            "id",
+            filter=(
+                Q(final_price__gte=low, final_price__lt=high)
+                if high is not None
+                else Q(final_price__gte=low)
+            ),
+        )
+        for index, (low, high) in enumerate(ranges)
+    }
+    price_filter = Q()
+    if min_price := params.get("min_price"):
+        price_filter &= Q(final_price__gte=min_price)
+    if max_price := params.get("max_price"):
+        price_filter &= Q(final_price__lte=max_price)
+
+    result = filter_products(queryset, params, exclude=["price"]).aggregate(
+        total=Count("id", filter=price_filter),
+        min_price=Min("final_price"),
+        max_price=Max("final_price"),
+        **aggregates,
+    )
+    return {
+        "total": result["total"],
+        "min_price": result["min_price"],
+        "max_price": result["max_price"],
+        "buckets": [
+            {
+                "min_price": low,
+                "max_price": high,
+                "count": result[f"bucket_{index}"],
+            }
+            for index, (low, high) in enumerate(ranges)
+        ],
+    }
+
+
+def get_category_counts(queryset, params):
+    """Product counts per category, rolled up through the category tree"""
+    counts = {}
+    for row in (
+        filter_products(queryset, params, exclude=["category"])
+        .order_by()
+        .values("category_id", "category__path")
+        .annotate(count=Count("id"))
+    ):
+        for category_id in row["category__path"].strip("/").split("/"):
+            category_id = int(category_id)
+            counts[category_id] = counts.get(category_id, 0) + row["count"]
+    return [
+        {"category_id": category_id, "count": count}
+        for category_id, count in sorted(counts.items())
+    ]
+
+
+def get_facet_counts(queryset, params):
+    """Sidebar counts for the grid under the given filter state"""
+    return {
+        "features": get_option_counts(queryset, params),
+        "price": get_price_buckets(queryset, params),
+        "categories": get_category_counts(queryset, params),
+    }
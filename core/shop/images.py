@@ -0,0 +1,123 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .cache import bump_catalog_version
+from .surrogate import get_product_surrogate_keys, purge_surrogate_keys
+
+DERIVATIVE_WIDTHS = (160, 320, 640)
+DERIVATIVE_QUALITY = 80
+DERIVATIVE_DIRECTORY = "derivatives"
+DERIVATIVE_MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+
+def get_derivative_formats():
+    """AVIF when the installed Pillow can encode it, WebP always"""
+    Image.init()
+    formats = ["webp"]
+    if "AVIF" in Image.SAVE:
+        formats.insert(0, "avif")
+    return formats
+
+
+def get_derivative_name(digest, width, extension):
+    return f"{DERIVATIVE_DIRECTORY}/{digest[:2]}/{digest}/{width}.{extension}"
+
+
+def render_derivative(image, width, extension):
+    height = max(1, round(image.height * width / image.width))
+    derivative = image.resize((width, height), Image.LANCZOS)
+    buffer = BytesIO()
+    derivative.save(
+        buffer, format=extension.upper(), quality=DERIVATIVE_QUALITY
+    )
+    return buffer.getvalue()
+
+
+def build_derivatives(name, storage=default_storage):
+    """
+    Render the responsive sizes of the image stored under name in every
+    derivative format. Files are addressed by the hash of the source, so
+    an image shared by many products is only rendered once.
+    """
+    with storage.open(name.lstrip("/"), "rb") as source:
+        content = source.read()
+    digest = hashlib.sha256(content).hexdigest()
+
+    image = Image.open(BytesIO(content))
+    # Never upscale, small sources get a single derivative of their width
+    widths = sorted({min(width, image.width) for width in DERIVATIVE_WIDTHS})
+    derivatives = {"source": name}
+    decoded = None
+    for extension in get_derivative_formats():
+        sizes = {}
+        for width in widths:
+            path = get_derivative_name(digest, width, extension)
+            if not storage.exists(path):
+                if decoded is None:
+                    decoded = ImageOps.exif_transpose(image)
+                    if decoded.mode not in ("RGB", "RGBA"):
+                        decoded = decoded.convert("RGBA")
+                path = storage.save(
+                    path,
+                    ContentFile(render_derivative(decoded, width, extension)),
+                )
+            sizes[str(width)] = path
+        derivatives[extension] = sizes
+    return derivatives
+
+
+def get_derivative_urls(derivatives, name, storage=default_storage):
+    """
+    URLs of the derivatives as {format: {width: url}}, empty while the
+    derivatives are missing or were rendered from an older source.
+    """
+    if not derivatives or derivatives.get("source") != name:
+        return {}
+    return {
+        extension: {
+            width: storage.url(path)
+            for width, path in derivatives[extension].items()
+        }
+        for extension in DERIVATIVE_MIME_TYPES
+        if extension in derivatives
+    }
+
+
+def get_picture_sources(derivatives, name, storage=default_storage):
+    """<source> candidates as [(mime type, srcset)], best format first"""
+    urls = get_derivative_urls(derivatives, name, storage)
+    return [
+        (
+            DERIVATIVE_MIME_TYPES[extension],
+            ", ".join(
+                f"{url} {width}w"
+                for width, url in sorted(
+                    urls[extension].items(), key=lambda item: int(item[0])
+                )
+            ),
+        )
+        for extension in DERIVATIVE_MIME_TYPES
+        if urls.get(extension)
+    ]
+
+
+def save_derivatives(name, derivatives):
+    """Attach derivatives to every product and gallery image of name"""
+    from .models import ProductImageModel, ProductModel
+
+    products = ProductModel.objects.filter(image=name)
+    images = ProductImageModel.objects.filter(file=name)
+    product_ids = {
+        *products.values_list("id", flat=True),
+        *images.values_list("product_id", flat=True),
+    }
+    updated = products.update(image_derivatives=derivatives)
+    images.update(derivatives=derivatives)
+    if updated:
+        # Cached listings embed the image urls
+        bump_catalog_version()
+    purge_surrogate_keys(get_product_surrogate_keys(product_ids))
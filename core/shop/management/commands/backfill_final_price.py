@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shop.models import ProductModel
+
+
+class Command(BaseCommand):
+    help = "محاسبه دوباره قیمت نهایی (پس از تخفیف) همه محصولات"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="تعداد محصولات به‌روزرسانی شده در هر مرحله",
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        total = ProductModel.objects.all().sync_final_price(
+            batch_size=kwargs["batch_size"]
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Final price updated for {total} products.")
+        )
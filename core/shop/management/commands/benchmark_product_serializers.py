@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from shop.api.v1.serializers import (
+    ProductListSerializer,
+    ProductListValuesSerializer,
+)
+from shop.models import ProductModel, ProductStatusType
+
+
+class Command(BaseCommand):
+    help = "مقایسه سرعت سریالایزر لیست محصولات با مسیر سریع مبتنی بر values()"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=100,
+            help="تعداد محصولات هر صفحه",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=50,
+            help="تعداد دفعات تکرار هر سریالایزر",
+        )
+
+    def measure(self, serialize, rounds):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            content = JSONRenderer().render(serialize())
+        return (time.perf_counter() - started) / rounds, content
+
+    def handle(self, *args, **kwargs):
+        page_size, rounds = kwargs["page_size"], kwargs["rounds"]
+        queryset = ProductModel.objects.filter(
+            status=ProductStatusType.publish.value
+        )
+        products = list(queryset.select_related("category")[:page_size])
+        rows = list(
+            queryset.values(*ProductListValuesSerializer.value_fields)[
+                :page_size
+            ]
+        )
+        if not products:
+            raise CommandError("There are no published products to serialize")
+        request = Request(RequestFactory().get("/"))
+
+        serializer_time, serializer_content = self.measure(
+            lambda: ProductListSerializer(
+                products, many=True, context={"request": request}
+            ).data,
+            rounds,
+        )
+        values_time, values_content = self.measure(
+            lambda: ProductListValuesSerializer(request).serialize(rows),
+            rounds,
+        )
+        if serializer_content != values_content:
+            raise CommandError("The serializers produced different output")
+
+        self.stdout.write(
+            f"{len(products)} products, {rounds} rounds\n"
+            f"ProductListSerializer:       {serializer_time * 1000:.2f} ms\n"
+            f"ProductListValuesSerializer: {values_time * 1000:.2f} ms"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Speedup: {serializer_time / values_time:.1f}x, "
+                "output is identical."
+            )
+        )
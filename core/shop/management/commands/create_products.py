@@ -79,7 +79,7 @@ class Command(BaseCommand):
         )
 
     def assign_features(self, product):
-        features = product.category.get_all_features()
+        features = product.category.get_feature_schema()
         value_generators = {
             "ابعاد": lambda: f"{randint(100, 200)}x{randint(50, 150)} سانتیمتر",
             "وزن": lambda: f"{uniform(0.5, 5.0):.1f} کیلوگرم",
@@ -89,8 +89,8 @@ class Command(BaseCommand):
         }
 
         for feature in features:
-            if feature.options.exists():
-                option = feature.options.order_by("?").first()
+            if options := feature.options.all():
+                option = random.choice(options)
                 ProductFeature.objects.create(
                     product=product, feature=feature, option=option
                 )
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.management.base import BaseCommand
+
+from shop.images import build_derivatives, save_derivatives
+from shop.models import ProductImageModel, ProductModel
+
+
+class Command(BaseCommand):
+    help = "ساخت تصاویر کوچک و WebP/AVIF برای تصاویر موجود محصولات"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="تعداد تصاویری که به صورت همزمان پردازش می‌شوند",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="ساخت دوباره حتی برای تصاویری که از قبل ساخته شده‌اند",
+        )
+
+    def get_names(self, force):
+        names = set()
+        for queryset, field, derivatives in (
+            (ProductModel.objects.all(), "image", "image_derivatives"),
+            (ProductImageModel.objects.all(), "file", "derivatives"),
+        ):
+            for name, current in queryset.values_list(field, derivatives):
+                if name and (force or current.get("source") != name):
+                    names.add(name)
+        return names
+
+    def handle(self, *args, **kwargs):
+        names = self.get_names(kwargs["force"])
+        processed = failed = 0
+        # Rendering runs in the workers, database writes stay here
+        with ThreadPoolExecutor(max_workers=kwargs["workers"]) as executor:
+            futures = {
+                executor.submit(build_derivatives, name): name
+                for name in names
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    derivatives = future.result()
+                except (OSError, SuspiciousFileOperation) as error:
+                    failed += 1
+                    self.stderr.write(f"Skipped {name}: {error}")
+                    continue
+                save_derivatives(name, derivatives)
+                processed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Derivatives generated for {processed} images, "
+                f"{failed} failed."
+            )
+        )
@@ -0,0 +1,264 @@
+import csv
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+
+from shop.cache import bump_catalog_version
+from shop.facets import index_product_features, normalize_facet_value
+from shop.models import (
+    ProductCategoryModel,
+    ProductFeature,
+    ProductModel,
+    ProductStatusType,
+)
+from shop.prices import invalidate_category_price_summary
+from shop.search import index_products
+
+User = get_user_model()
+FEATURE_COLUMN_PREFIX = "feature:"
+# The largest value of a PositiveIntegerField on every database
+MAX_STOCK = 2147483647
+# price is a DecimalField(max_digits=10, decimal_places=0)
+MAX_PRICE = Decimal(10) ** ProductModel._meta.get_field("price").max_digits - 1
+
+
+class RowError(ValueError):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "وارد کردن دسته‌ای محصولات از فایل CSV یا JSONL. در CSV ویژگی‌ها "
+        "در ستون‌های feature:<نام ویژگی> و در JSONL در کلید features قرار "
+        "می‌گیرند"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="مسیر فایل ورودی، برای ورودی استاندارد از - استفاده کنید",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="قالب فایل ورودی، به صورت پیش‌فرض از پسوند فایل",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="تعداد محصولات ذخیره شده در هر تراکنش",
+        )
+        parser.add_argument(
+            "--user",
+            default="import_products@example.com",
+            help="ایمیل کاربری که محصولات به نام او ثبت می‌شوند",
+        )
+
+    def handle(self, *args, **kwargs):
+        input_format = kwargs["format"] or kwargs["path"].rsplit(".", 1)[-1]
+        if input_format not in ("csv", "jsonl"):
+            raise CommandError("Input format must be csv or jsonl")
+        self.user, created = User.objects.get_or_create(
+            email=kwargs["user"],
+            defaults={"password": "ImportProducts123@"},
+        )
+        self.categories = {}
+        self.slugs = set(
+            ProductModel.objects.values_list("slug", flat=True).iterator()
+        )
+        self.slug_suffixes = {}
+
+        stream = (
+            sys.stdin
+            if kwargs["path"] == "-"
+            else open(kwargs["path"], encoding="utf-8-sig", newline="")
+        )
+        imported = skipped = 0
+        started = time.monotonic()
+        try:
+            rows = enumerate(self.read_rows(stream, input_format), start=1)
+            while chunk := list(islice(rows, kwargs["chunk_size"])):
+                products, features = [], []
+                for line, row in chunk:
+                    try:
+                        product, product_features = self.build_product(row)
+                    except RowError as error:
+                        skipped += 1
+                        self.stderr.write(f"Row {line} skipped: {error}")
+                        continue
+                    products.append(product)
+                    features.append(product_features)
+                self.save_chunk(products, features)
+                imported += len(products)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{imported} products imported "
+                    f"({imported / max(elapsed, 1e-6):.0f} products/s)"
+                )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if imported:
+                invalidate_category_price_summary()
+                bump_catalog_version()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{imported} products imported and {skipped} rows skipped "
+                f"in {elapsed:.1f}s."
+            )
+        )
+
+    def read_rows(self, stream, input_format):
+        if input_format == "csv":
+            for row in csv.DictReader(stream):
+                row["features"] = {
+                    key.removeprefix(FEATURE_COLUMN_PREFIX): value
+                    for key, value in row.items()
+                    if key.startswith(FEATURE_COLUMN_PREFIX) and value
+                }
+                yield row
+            return
+        for line in stream:
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield (
+                    row
+                    if isinstance(row, dict)
+                    else {"_error": "not a JSON object"}
+                )
+
+    def get_category(self, value):
+        """Category by slug or id with its inherited features preloaded"""
+        key = str(value or "").strip()
+        if key not in self.categories:
+            lookup = {"pk": key} if key.isdigit() else {"slug": key}
+            category = ProductCategoryModel.objects.filter(**lookup).first()
+            features = {}
+            if category:
+                for feature in category.get_feature_schema():
+                    features[feature.name] = (
+                        feature,
+                        {
+                            normalize_facet_value(option.value): option
+                            for option in feature.options.all()
+                        },
+                    )
+            self.categories[key] = (category, features)
+        return self.categories[key]
+
+    def allocate_slug(self, value):
+        """Unique slug decided in memory, without a query per product"""
+        base = slugify(value, allow_unicode=True)[:40] or "product"
+        slug = base
+        while slug in self.slugs:
+            self.slug_suffixes[base] = self.slug_suffixes.get(base, 1) + 1
+            slug = f"{base}-{self.slug_suffixes[base]}"
+        self.slugs.add(slug)
+        return slug
+
+    def get_number(
+        self, row, name, default, cast=int, min_value=0, max_value=None
+    ):
+        """
+        A number column within [min_value, max_value], checked here so
+        the database never rejects a row halfway through a chunk
+        """
+        value = row.get(name)
+        if value in (None, ""):
+            return default
+        try:
+            number = cast(str(value).replace(",", ""))
+            in_range = min_value <= number and (
+                max_value is None or number <= max_value
+            )
+        except (ValueError, InvalidOperation):
+            in_range = False
+        if not in_range:
+            raise RowError(f"invalid {name} {value!r}")
+        return number
+
+    def get_status(self, row):
+        value = row.get("status")
+        if value in (None, ""):
+            return ProductStatusType.draft.value
+        if str(value).isdigit() and int(value) in ProductStatusType.values:
+            return int(value)
+        if value in ProductStatusType.names:
+            return ProductStatusType[value].value
+        raise RowError(f"invalid status {value!r}")
+
+    def build_product(self, row):
+        if "_error" in row:
+            raise RowError(row["_error"])
+        title = str(row.get("title") or "").strip()
+        if not title:
+            raise RowError("title is required")
+        if len(title) > ProductModel._meta.get_field("title").max_length:
+            raise RowError("title is too long")
+        category, category_features = self.get_category(
+            row.get("category") or row.get("category_id")
+        )
+        if category is None:
+            raise RowError(f"unknown category {row.get('category')!r}")
+
+        product = ProductModel(
+            user=self.user,
+            category=category,
+            title=title,
+            slug=self.allocate_slug(row.get("slug") or title),
+            description=row.get("description") or "",
+            brief_description=row.get("brief_description") or None,
+            price=self.get_number(
+                row, "price", Decimal(0), Decimal, max_value=MAX_PRICE
+            ),
+            discount_percent=self.get_number(
+                row, "discount_percent", 0, max_value=100
+            ),
+            stock=self.get_number(row, "stock", 0, max_value=MAX_STOCK),
+            status=self.get_status(row),
+        )
+        if row.get("image"):
+            # a path relative to MEDIA_ROOT, files are not copied
+            product.image = row["image"]
+        # save() is bypassed by bulk_create
+        product.final_price = product.get_price()
+
+        product_features = []
+        for name, value in (row.get("features") or {}).items():
+            if name not in category_features:
+                raise RowError(f"unknown feature {name!r}")
+            feature, options = category_features[name]
+            option = options.get(normalize_facet_value(value))
+            product_features.append(
+                ProductFeature(
+                    feature=feature,
+                    option=option,
+                    value=None if option else str(value),
+                )
+            )
+        return product, product_features
+
+    @transaction.atomic
+    def save_chunk(self, products, features):
+        ProductModel.objects.bulk_create(products)
+        product_features = []
+        for product, features_of_product in zip(products, features):
+            for product_feature in features_of_product:
+                product_feature.product = product
+                product_features.append(product_feature)
+        ProductFeature.objects.bulk_create(product_features)
+        index_product_features(product_features)
+        index_products([product.pk for product in products])
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shop.models import ProductCategoryModel
+
+
+class Command(BaseCommand):
+    help = "بازسازی مسیر ذخیره شده دسته‌بندی‌ها از روی ستون parent"
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        categories = list(
+            ProductCategoryModel.objects.only("id", "parent_id", "path")
+        )
+        parents = {category.id: category.parent_id for category in categories}
+
+        changed = []
+        for category in categories:
+            path = self.build_path(category.id, parents)
+            if category.path != path:
+                category.path = path
+                changed.append(category)
+
+        ProductCategoryModel.objects.bulk_update(
+            changed, ["path"], batch_size=1000
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Category tree rebuilt, {len(changed)} paths were updated."
+            )
+        )
+
+    def build_path(self, pk, parents):
+        ids = []
+        while pk is not None and pk not in ids:
+            ids.append(pk)
+            pk = parents.get(pk)
+        return "/" + "".join(f"{pk}/" for pk in reversed(ids))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shop.facets import get_facet_values
+from shop.models import ProductFacetModel, ProductFeature
+
+
+class Command(BaseCommand):
+    help = "بازسازی کامل ایندکس فیلتر ویژگی‌های محصولات"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="تعداد ردیف‌های ذخیره شده در هر مرحله",
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs["batch_size"]
+        ProductFacetModel.objects.all().delete()
+
+        facets = []
+        total = 0
+        for product_feature in ProductFeature.objects.select_related(
+            "option"
+        ).iterator(chunk_size=batch_size):
+            facets.extend(
+                ProductFacetModel(
+                    product_feature_id=product_feature.id,
+                    product_id=product_feature.product_id,
+                    feature_id=product_feature.feature_id,
+                    value=value,
+                )
+                for value in get_facet_values(product_feature)
+            )
+            if len(facets) >= batch_size:
+                ProductFacetModel.objects.bulk_create(facets)
+                total += len(facets)
+                facets = []
+        ProductFacetModel.objects.bulk_create(facets)
+        total += len(facets)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Facet index rebuilt with {total} rows.")
+        )
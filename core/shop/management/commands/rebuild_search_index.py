@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from shop.models import ProductModel
+from shop.search import index_products
+
+
+class Command(BaseCommand):
+    help = "بازسازی ایندکس جستجوی محصولات"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="تعداد محصولات ایندکس شده در هر مرحله",
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs["batch_size"]
+        product_ids = list(
+            ProductModel.objects.order_by("id").values_list("id", flat=True)
+        )
+        for start in range(0, len(product_ids), batch_size):
+            end = start + batch_size
+            index_products(product_ids[start:end])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Search index rebuilt for {len(product_ids)} products."
+            )
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from shop.recommendations import rebuild_similar_products
+
+
+class Command(BaseCommand):
+    help = "محاسبه دوباره محصولات مشابه همه محصولات"
+
+    def handle(self, *args, **kwargs):
+        total = rebuild_similar_products()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Similar products rebuilt with {total} rows.")
+        )
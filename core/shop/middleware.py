@@ -0,0 +1,16 @@
+from .surrogate import apply_edge_cache_headers
+
+
+class EdgeCacheMiddleware:
+    """
+    Let the edge cache keep responses tagged with surrogate keys when
+    they are safe to share, and make every other tagged one private.
+    Placed first so it sees the cookies set by the other middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return apply_edge_cache_headers(request, response)
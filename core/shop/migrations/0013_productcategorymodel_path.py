@@ -0,0 +1,40 @@
+# Generated by Django 4.2.18 on 2026-10-18 17:43
+
+from django.db import migrations, models
+
+
+def populate_category_paths(apps, schema_editor):
+    ProductCategoryModel = apps.get_model("shop", "ProductCategoryModel")
+    parents = dict(ProductCategoryModel.objects.values_list("id", "parent_id"))
+
+    def build_path(pk):
+        ids = []
+        while pk is not None:
+            ids.append(pk)
+            pk = parents.get(pk)
+        return "/" + "".join(f"{pk}/" for pk in reversed(ids))
+
+    categories = list(ProductCategoryModel.objects.only("id"))
+    for category in categories:
+        category.path = build_path(category.id)
+    ProductCategoryModel.objects.bulk_update(categories, ["path"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0012_alter_wishlistproductmodel_options"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productcategorymodel",
+            name="path",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=255
+            ),
+        ),
+        migrations.RunPython(
+            populate_category_paths, migrations.RunPython.noop
+        ),
+    ]
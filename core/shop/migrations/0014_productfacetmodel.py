@@ -0,0 +1,91 @@
+# Generated by Django 4.2.18 on 2026-10-18 17:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_facets(apps, schema_editor):
+    ProductFeature = apps.get_model("shop", "ProductFeature")
+    ProductFacetModel = apps.get_model("shop", "ProductFacetModel")
+
+    def normalize(value):
+        return " ".join(str(value).split()).casefold()
+
+    facets = []
+    for product_feature in ProductFeature.objects.select_related(
+        "option"
+    ).iterator(chunk_size=2000):
+        values = {normalize(product_feature.value or "")}
+        if product_feature.option_id:
+            values.add(normalize(product_feature.option.value))
+        values.discard("")
+        facets.extend(
+            ProductFacetModel(
+                product_feature_id=product_feature.id,
+                product_id=product_feature.product_id,
+                feature_id=product_feature.feature_id,
+                value=value,
+            )
+            for value in values
+        )
+        if len(facets) >= 2000:
+            ProductFacetModel.objects.bulk_create(facets)
+            facets = []
+    ProductFacetModel.objects.bulk_create(facets)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0013_productcategorymodel_path"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductFacetModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.CharField(max_length=255)),
+                (
+                    "feature",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="shop.categoryfeature",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="facets",
+                        to="shop.productmodel",
+                    ),
+                ),
+                (
+                    "product_feature",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="facets",
+                        to="shop.productfeature",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["feature", "value", "product"],
+                        name="shop_produc_feature_a13665_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.18 on 2026-10-18 17:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_search_tokens(apps, schema_editor):
+    from shop.search import get_product_tokens
+
+    ProductModel = apps.get_model("shop", "ProductModel")
+    ProductFeature = apps.get_model("shop", "ProductFeature")
+    ProductSearchTokenModel = apps.get_model("shop", "ProductSearchTokenModel")
+
+    feature_values = {}
+    for product_id, value, option_value in ProductFeature.objects.values_list(
+        "product_id", "value", "option__value"
+    ).iterator(chunk_size=2000):
+        feature_values.setdefault(product_id, []).extend(
+            v for v in (value, option_value) if v
+        )
+
+    tokens = []
+    for pk, title, brief_description in ProductModel.objects.values_list(
+        "id", "title", "brief_description"
+    ).iterator(chunk_size=2000):
+        tokens.extend(
+            ProductSearchTokenModel(product_id=pk, token=token, weight=weight)
+            for token, weight in get_product_tokens(
+                title, brief_description, feature_values.get(pk, [])
+            ).items()
+        )
+        if len(tokens) >= 2000:
+            ProductSearchTokenModel.objects.bulk_create(tokens)
+            tokens = []
+    ProductSearchTokenModel.objects.bulk_create(tokens)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0014_productfacetmodel"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductSearchTokenModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(db_index=True, max_length=64)),
+                ("weight", models.PositiveSmallIntegerField(default=1)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to="shop.productmodel",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="productsearchtokenmodel",
+            constraint=models.UniqueConstraint(
+                fields=("token", "product"), name="unique_product_search_token"
+            ),
+        ),
+        migrations.RunPython(
+            populate_search_tokens, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.18 on 2026-10-18 17:52
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def populate_final_prices(apps, schema_editor):
+    ProductModel = apps.get_model("shop", "ProductModel")
+    products = list(
+        ProductModel.objects.only("id", "price", "discount_percent")
+    )
+    for product in products:
+        discount_amount = product.price * Decimal(
+            product.discount_percent / 100
+        )
+        product.final_price = round(product.price - discount_amount)
+    ProductModel.objects.bulk_update(
+        products, ["final_price"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0015_productsearchtokenmodel"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productmodel",
+            name="final_price",
+            field=models.DecimalField(
+                decimal_places=0, default=0, editable=False, max_digits=10
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productmodel",
+            index=models.Index(
+                fields=["final_price"], name="shop_produc_final_p_2b7f93_idx"
+            ),
+        ),
+        migrations.RunPython(populate_final_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.18 on 2026-10-18 18:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0016_productmodel_final_price"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarProductModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rank", models.PositiveSmallIntegerField()),
+                ("score", models.FloatField()),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_products",
+                        to="shop.productmodel",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="shop.productmodel",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["rank"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="similarproductmodel",
+            constraint=models.UniqueConstraint(
+                fields=("product", "rank"), name="unique_similar_product_rank"
+            ),
+        ),
+    ]
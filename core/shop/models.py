@@ -2,10 +2,24 @@ from datetime import timedelta
 from decimal import Decimal
 
 from ckeditor_uploader.fields import RichTextUploadingField
+from django.core.cache import cache
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Length
 from django.utils import timezone
 
+from .cache import (
+    FEATURE_SCHEMA_CACHE_TIMEOUT,
+    bump_catalog_version,
+    bump_category_price_summary_version,
+    get_feature_schema_cache_key,
+    get_feature_schema_version,
+)
+from .images import get_derivative_urls, get_picture_sources
+
+# Per process copy of the feature schemas of the current schema version
+_feature_schemas = {"version": None, "schemas": {}}
+
 
 class ProductStatusType(models.IntegerChoices):
     publish = 1, ("منتشر شده")
@@ -23,6 +37,11 @@ class ProductCategoryModel(models.Model):
     )
     title = models.CharField(max_length=255)
     slug = models.SlugField(allow_unicode=True, unique=True)
+    # Materialized path of primary keys from the root, e.g. "/1/5/12/".
+    # Maintained by the signals in shop.signals.
+    path = models.CharField(
+        max_length=255, db_index=True, editable=False, blank=True
+    )
 
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
@@ -33,64 +52,89 @@ class ProductCategoryModel(models.Model):
     def __str__(self):
         return self.title
 
+    def get_path_ids(self):
+        """Get the ids from the root down to this category"""
+        if not self.path:
+            return [self.pk]
+        return [int(pk) for pk in self.path.strip("/").split("/")]
+
+    def get_ancestor_ids(self):
+        """Get the ids of all parent categories from the root down"""
+        return self.get_path_ids()[:-1]
+
     def get_ancestors(self):
         """Get all parent categories from the root to this category"""
-        ancestors = []
-        current = self.parent
-        while current:
-            ancestors.append(current)
-            current = current.parent
-        return ancestors
+        ancestor_ids = self.get_ancestor_ids()
+        ancestors = ProductCategoryModel.objects.in_bulk(ancestor_ids)
+        return [ancestors[pk] for pk in ancestor_ids if pk in ancestors]
 
     def get_all_features_is_required(self):
         """Get all the properties of this category and its parent categories"""
-        from .models import CategoryFeature
-
-        features = CategoryFeature.objects.filter(
-            category=self, is_required=True
-        )
-        for ancestor in self.get_ancestors():
-            features |= CategoryFeature.objects.filter(
-                category=ancestor, is_required=True
-            )
-        return features
+        return self.get_all_features().filter(is_required=True)
 
     def get_all_features(self):
-        """Get all the properties of this category and its parent categories"""
-        from .models import CategoryFeature
-
-        features = CategoryFeature.objects.filter(category=self)
-        for ancestor in self.get_ancestors():
-            features |= CategoryFeature.objects.filter(category=ancestor)
-        return features
+        """
+        Get all the properties of this category and its parent categories,
+        root first, in one query on the materialized path
+        """
+        return CategoryFeature.objects.filter(
+            category_id__in=self.get_path_ids()
+        ).order_by(Length("category__path"), "id")
+
+    def get_feature_schema(self):
+        """
+        Inherited features of this category with their options prefetched,
+        memoized in process and in the cache until the tree, a feature or
+        an option changes
+        """
+        version = get_feature_schema_version()
+        if _feature_schemas["version"] != version:
+            _feature_schemas.update(version=version, schemas={})
+        schemas = _feature_schemas["schemas"]
+        if self.pk not in schemas:
+            cache_key = get_feature_schema_cache_key(
+                "category_feature_schema", self.pk
+            )
+            schema = cache.get(cache_key)
+            if schema is None:
+                schema = list(
+                    self.get_all_features().prefetch_related("options")
+                )
+                cache.set(cache_key, schema, FEATURE_SCHEMA_CACHE_TIMEOUT)
+            schemas[self.pk] = schema
+        return schemas[self.pk]
+
+    def get_subtree(self):
+        """Queryset of this category and all of its subcategories"""
+        return ProductCategoryModel.objects.filter(path__startswith=self.path)
 
     def get_all_subcategories(self):
-        """Collect all subcategories recursively"""
-        subcategories = list(self.subcategories.all())
-        for subcategory in self.subcategories.all():
-            subcategories.extend(subcategory.get_all_subcategories())
-        return subcategories
+        """Collect all subcategories at any depth"""
+        return list(self.get_subtree().exclude(pk=self.pk))
 
     def get_cheapest_product_price(self):
         """Finding the cheapest product across all subcategories"""
         from django.db.models import Min
 
-        all_categories = [self] + self.get_all_subcategories()
-        category_ids = [cat.id for cat in all_categories]
         result = ProductModel.objects.filter(
-            category_id__in=category_ids
-        ).aggregate(min_price=Min("price"))
+            category__path__startswith=self.path
+        ).aggregate(min_price=Min("final_price"))
 
         return result["min_price"]
 
     def get_descendants(self):
+        """Nested tree of all subcategories, built from a single query"""
+        children = {}
+        for category in self.get_subtree().exclude(pk=self.pk):
+            children.setdefault(category.parent_id, []).append(category)
 
-        descendants = []
-        for child in self.subcategories.all():
-            descendants.append(
-                {"category": child, "children": child.get_descendants()}
-            )
-        return descendants
+        def build(parent_id):
+            return [
+                {"category": child, "children": build(child.pk)}
+                for child in children.get(parent_id, [])
+            ]
+
+        return build(self.pk)
 
 
 class CategoryFeature(models.Model):
@@ -117,6 +161,27 @@ class FeatureOption(models.Model):
         return self.value
 
 
+class ProductQuerySet(models.QuerySet):
+    def sync_final_price(self, batch_size=1000):
+        """Recalculate the stored final_price of products in batches"""
+        products = []
+        updated = 0
+        for product in self.only("id", "price", "discount_percent").iterator(
+            chunk_size=batch_size
+        ):
+            product.final_price = product.get_price()
+            products.append(product)
+            if len(products) >= batch_size:
+                updated += self.model.objects.bulk_update(
+                    products, ["final_price"]
+                )
+                products = []
+        updated += self.model.objects.bulk_update(products, ["final_price"])
+        bump_category_price_summary_version()
+        bump_catalog_version()
+        return updated
+
+
 class ProductModel(models.Model):
     user = models.ForeignKey(
         "accounts.CustomUser",
@@ -133,6 +198,10 @@ class ProductModel(models.Model):
     image = models.ImageField(
         default="/default/product-image.png", upload_to="product/img/"
     )
+    # Responsive WebP/AVIF renditions of image, see shop.images
+    image_derivatives = models.JSONField(
+        default=dict, blank=True, editable=False
+    )
     description = RichTextUploadingField()
     brief_description = models.TextField(
         null=True,
@@ -152,8 +221,16 @@ class ProductModel(models.Model):
         default=0,
         validators=[MinValueValidator(0), MaxValueValidator(100)],
     )
+    final_price = models.DecimalField(
+        default=0,
+        max_digits=10,
+        decimal_places=0,
+        editable=False,
+    )
     avg_rate = models.FloatField(default=0.0)
 
+    objects = ProductQuerySet.as_manager()
+
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
 
@@ -162,14 +239,46 @@ class ProductModel(models.Model):
         indexes = [
             models.Index(fields=["status", "-created_date", "-avg_rate"]),
             models.Index(fields=["price"]),
+            models.Index(fields=["final_price"]),
         ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_stock = instance.__dict__.get("stock")
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.final_price = self.get_price()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"price", "discount_percent"} & set(
+            update_fields
+        ):
+            kwargs["update_fields"] = {*update_fields, "final_price"}
+        super().save(*args, **kwargs)
+        self._loaded_stock = self.stock
+
+    def has_availability_changed(self):
+        """Whether the stock crossed zero since the product was loaded"""
+        loaded_stock = getattr(self, "_loaded_stock", None)
+        return loaded_stock is None or (loaded_stock == 0) != (self.stock == 0)
+
+    def get_image_derivative_urls(self):
+        return get_derivative_urls(self.image_derivatives, self.image.name)
+
+    def get_image_sources(self):
+        return get_picture_sources(self.image_derivatives, self.image.name)
+
     def get_price(self):
-        discount_amount = self.price * Decimal(self.discount_percent / 100)
-        discounted_amount = self.price - discount_amount
+        return self.calculate_price(self.price, self.discount_percent)
+
+    @staticmethod
+    def calculate_price(price, discount_percent):
+        discount_amount = price * Decimal(discount_percent / 100)
+        discounted_amount = price - discount_amount
         return round(discounted_amount)
 
     def is_discounted(self):
@@ -218,11 +327,91 @@ class ProductFeature(models.Model):
         return f"{self.product.title} - {self.feature.name}"
 
 
+class ProductFacetModel(models.Model):
+    """Inverted index of (feature, normalized value) -> product"""
+
+    product_feature = models.ForeignKey(
+        ProductFeature,
+        on_delete=models.CASCADE,
+        related_name="facets",
+    )
+    product = models.ForeignKey(
+        ProductModel,
+        on_delete=models.CASCADE,
+        related_name="facets",
+    )
+    feature = models.ForeignKey(
+        CategoryFeature,
+        on_delete=models.CASCADE,
+    )
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["feature", "value", "product"]),
+        ]
+
+    def __str__(self):
+        return f"{self.feature_id}:{self.value} - {self.product_id}"
+
+
+class ProductSearchTokenModel(models.Model):
+    """Inverted full-text index of normalized product tokens"""
+
+    product = models.ForeignKey(
+        ProductModel,
+        on_delete=models.CASCADE,
+        related_name="search_tokens",
+    )
+    token = models.CharField(max_length=64, db_index=True)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["token", "product"],
+                name="unique_product_search_token",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.token} - {self.product_id}"
+
+
+class SimilarProductModel(models.Model):
+    """Precomputed top similar products of a product, best rank first"""
+
+    product = models.ForeignKey(
+        ProductModel,
+        on_delete=models.CASCADE,
+        related_name="similar_products",
+    )
+    similar = models.ForeignKey(
+        ProductModel,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "rank"], name="unique_similar_product_rank"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.similar_id}"
+
+
 class ProductImageModel(models.Model):
     product = models.ForeignKey(
         ProductModel, on_delete=models.CASCADE, related_name="product_images"
     )
     file = models.ImageField(upload_to="product/extra-img/")
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
 
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
@@ -230,6 +419,12 @@ class ProductImageModel(models.Model):
     class Meta:
         ordering = ["-created_date"]
 
+    def get_derivative_urls(self):
+        return get_derivative_urls(self.derivatives, self.file.name)
+
+    def get_sources(self):
+        return get_picture_sources(self.derivatives, self.file.name)
+
 
 class WishlistProductModel(models.Model):
     user = models.ForeignKey("accounts.CustomUser", on_delete=models.PROTECT)
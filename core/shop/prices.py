@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+from .cache import (
+    bump_category_price_summary_version,
+    get_category_price_summary_cache_key,
+)
+from .models import ProductCategoryModel, ProductModel, ProductStatusType
+
+CATEGORY_PRICE_SUMMARY_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def get_direct_price_stats():
+    """Price stats of published products grouped by their own category"""
+    rows = (
+        ProductModel.objects.filter(status=ProductStatusType.publish.value)
+        .order_by()
+        .values("category_id")
+        .annotate(
+            min_price=Min("final_price"),
+            max_price=Max("final_price"),
+            count=Count("id"),
+        )
+    )
+    return {row.pop("category_id"): row for row in rows}
+
+
+def roll_up_price_stats(paths, direct_stats):
+    """Merge the stats of every category into all of its ancestors"""
+    summary = {
+        category_id: {"min_price": None, "max_price": None, "count": 0}
+        for category_id in paths
+    }
+    for category_id, stats in direct_stats.items():
+        path = paths.get(category_id)
+        if not path:
+            continue
+        for ancestor_id in path.strip("/").split("/"):
+            entry = summary.get(int(ancestor_id))
+            if entry is None:
+                continue
+            entry["count"] += stats["count"]
+            if entry["min_price"] is None:
+                entry["min_price"] = stats["min_price"]
+                entry["max_price"] = stats["max_price"]
+            else:
+                entry["min_price"] = min(
+                    entry["min_price"], stats["min_price"]
+                )
+                entry["max_price"] = max(
+                    entry["max_price"], stats["max_price"]
+                )
+    return summary
+
+
+def build_category_price_summary():
+    paths = dict(ProductCategoryModel.objects.values_list("id", "path"))
+    return roll_up_price_stats(paths, get_direct_price_stats())
+
+
+def get_category_price_summary():
+    """
+    Min/max final price and published product count of every category,
+    including its subcategories, as {category_id: stats}.
+    """
+    # The key is read before the queries, a change committed meanwhile
+    # moves readers to a new key instead of keeping the stale summary
+    key = get_category_price_summary_cache_key()
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_category_price_summary()
+        cache.set(key, summary, CATEGORY_PRICE_SUMMARY_TIMEOUT)
+    return summary
+
+
+def invalidate_category_price_summary():
+    """Rebuild the summary lazily once the current transaction commits"""
+    transaction.on_commit(bump_category_price_summary_version)
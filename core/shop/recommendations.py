@@ -0,0 +1,126 @@
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from django.db import transaction
+
+from order.models import OrderItemModel, OrderStatusType
+
+from .models import (
+    ProductFacetModel,
+    ProductModel,
+    ProductStatusType,
+    SimilarProductModel,
+)
+from .surrogate import SIMILAR_PRODUCTS_SURROGATE_KEY, purge_surrogate_keys
+
+SIMILAR_PRODUCTS_LIMIT = 8
+CATEGORY_WEIGHT = 1.0
+FEATURE_WEIGHT = 0.5
+CO_PURCHASE_WEIGHT = 2.0
+# values or orders shared by more products than this say little about
+# similarity and would make the pair count quadratic
+MAX_GROUP_SIZE = 200
+
+
+def count_pairs(groups):
+    """How many groups every pair of products shares"""
+    pairs = Counter()
+    for members in groups:
+        if 1 < len(members) <= MAX_GROUP_SIZE:
+            pairs.update(combinations(sorted(members), 2))
+    return pairs
+
+
+def get_similarity_scores():
+    """Score candidate pairs from shared feature values and co-purchases"""
+    scores = defaultdict(Counter)
+
+    facets = defaultdict(set)
+    for product_id, feature_id, value in ProductFacetModel.objects.filter(
+        product__status=ProductStatusType.publish.value
+    ).values_list("product_id", "feature_id", "value"):
+        facets[(feature_id, value)].add(product_id)
+
+    orders = defaultdict(set)
+    for order_id, product_id in OrderItemModel.objects.filter(
+        order__status=OrderStatusType.success.value,
+        product__status=ProductStatusType.publish.value,
+    ).values_list("order_id", "product_id"):
+        orders[order_id].add(product_id)
+
+    for weight, groups in (
+        (FEATURE_WEIGHT, facets.values()),
+        (CO_PURCHASE_WEIGHT, orders.values()),
+    ):
+        for (first, second), count in count_pairs(groups).items():
+            scores[first][second] += weight * count
+            scores[second][first] += weight * count
+    return scores
+
+
+def compute_similar_products(limit=SIMILAR_PRODUCTS_LIMIT):
+    """
+    Top similar published products of every published product as
+    {product_id: [(similar_id, score), ...]}. Candidates sharing the
+    category get a bonus, and products with too few candidates are
+    filled up with the newest products of their category.
+    """
+    categories = {}
+    members = defaultdict(list)
+    for product_id, category_id in (
+        ProductModel.objects.filter(status=ProductStatusType.publish.value)
+        .order_by("-created_date")
+        .values_list("id", "category_id")
+    ):
+        categories[product_id] = category_id
+        members[category_id].append(product_id)
+
+    scores = get_similarity_scores()
+    similar_products = {}
+    for product_id, category_id in categories.items():
+        candidates = scores.get(product_id, Counter())
+        for candidate_id in candidates:
+            if categories[candidate_id] == category_id:
+                candidates[candidate_id] += CATEGORY_WEIGHT
+        ranked = sorted(
+            candidates.items(), key=lambda item: (-item[1], item[0])
+        )
+        ranked = ranked[:limit]
+
+        chosen = {candidate_id for candidate_id, _ in ranked}
+        for member_id in members[category_id]:
+            if len(ranked) >= limit:
+                break
+            if member_id != product_id and member_id not in chosen:
+                ranked.append((member_id, CATEGORY_WEIGHT))
+        similar_products[product_id] = ranked
+    return similar_products
+
+
+@transaction.atomic
+def rebuild_similar_products(limit=SIMILAR_PRODUCTS_LIMIT):
+    """Replace the similar products table, returns the number of rows"""
+    rows = [
+        SimilarProductModel(
+            product_id=product_id,
+            similar_id=similar_id,
+            rank=rank,
+            score=score,
+        )
+        for product_id, ranked in compute_similar_products(limit).items()
+        for rank, (similar_id, score) in enumerate(ranked, start=1)
+    ]
+    SimilarProductModel.objects.all().delete()
+    SimilarProductModel.objects.bulk_create(rows, batch_size=1000)
+    purge_surrogate_keys([SIMILAR_PRODUCTS_SURROGATE_KEY])
+    return len(rows)
+
+
+def get_similar_products(product, limit=4):
+    """Similar published products of a product from one indexed lookup"""
+    return [
+        row.similar
+        for row in SimilarProductModel.objects.filter(
+            product=product, similar__status=ProductStatusType.publish.value
+        ).select_related("similar", "similar__category")[:limit]
+    ]
@@ -0,0 +1,151 @@
+import re
+
+from django.db.models import Exists, IntegerField, OuterRef, Q, Subquery, Sum
+
+from .models import ProductFeature, ProductModel, ProductSearchTokenModel
+
+ZWNJ = "\u200c"
+TITLE_WEIGHT = 3
+BRIEF_DESCRIPTION_WEIGHT = 2
+FEATURE_WEIGHT = 1
+MAX_TOKEN_LENGTH = 64
+
+PERSIAN_TRANSLATION = str.maketrans(
+    {
+        "ي": "ی",
+        "ى": "ی",
+        "ك": "ک",
+        "ة": "ه",
+        "ۀ": "ه",
+        "أ": "ا",
+        "إ": "ا",
+        "ٱ": "ا",
+        **{digit: str(index) for index, digit in enumerate("۰۱۲۳۴۵۶۷۸۹")},
+        **{digit: str(index) for index, digit in enumerate("٠١٢٣٤٥٦٧٨٩")},
+        # zero width joiners, bidi marks and tatweel
+        "\u200d": None,
+        "\u200e": None,
+        "\u200f": None,
+        "\u0640": None,
+    }
+)
+DIACRITICS_RE = re.compile("[\u064b-\u065f\u0670]")
+TOKEN_RE = re.compile(rf"[\w{ZWNJ}]+")
+
+
+def normalize_text(text):
+    """
+    Normalize Persian text for matching: unify Arabic and Persian
+    letters, convert Persian and Arabic digits, drop diacritics and
+    lowercase everything. ZWNJ is kept so tokenizers can decide on it.
+    """
+    text = DIACRITICS_RE.sub("", str(text).translate(PERSIAN_TRANSLATION))
+    return text.casefold()
+
+
+def tokenize(text):
+    """Tokens for the index, half-space words also yield their parts"""
+    tokens = []
+    for word in TOKEN_RE.findall(normalize_text(text)):
+        parts = [part for part in word.split(ZWNJ) if part]
+        if not parts:
+            continue
+        tokens.append("".join(parts)[:MAX_TOKEN_LENGTH])
+        if len(parts) > 1:
+            tokens.extend(part[:MAX_TOKEN_LENGTH] for part in parts)
+    return tokens
+
+
+def tokenize_query(text):
+    """Tokens of a search query, half-space words are joined"""
+    return list(
+        dict.fromkeys(
+            word.replace(ZWNJ, "")[:MAX_TOKEN_LENGTH]
+            for word in TOKEN_RE.findall(normalize_text(text))
+            if word.replace(ZWNJ, "")
+        )
+    )
+
+
+def get_product_tokens(title, brief_description, feature_values):
+    """Weighted tokens of a product as {token: weight}"""
+    tokens = {}
+    sources = [
+        (title, TITLE_WEIGHT),
+        (brief_description, BRIEF_DESCRIPTION_WEIGHT),
+        *((value, FEATURE_WEIGHT) for value in feature_values),
+    ]
+    for text, weight in sources:
+        for token in set(tokenize(text or "")):
+            tokens[token] = tokens.get(token, 0) + weight
+    return tokens
+
+
+def get_feature_values(product_features):
+    values = []
+    for product_feature in product_features:
+        if product_feature.value:
+            values.append(product_feature.value)
+        if product_feature.option_id:
+            values.append(product_feature.option.value)
+    return values
+
+
+def index_products(product_ids):
+    """Rebuild the search tokens of the given products"""
+    product_ids = list(product_ids)
+    features = {}
+    for product_feature in ProductFeature.objects.filter(
+        product_id__in=product_ids
+    ).select_related("option"):
+        features.setdefault(product_feature.product_id, []).append(
+            product_feature
+        )
+
+    ProductSearchTokenModel.objects.filter(product_id__in=product_ids).delete()
+    ProductSearchTokenModel.objects.bulk_create(
+        [
+            ProductSearchTokenModel(product_id=pk, token=token, weight=weight)
+            for pk, title, brief_description in ProductModel.objects.filter(
+                id__in=product_ids
+            ).values_list("id", "title", "brief_description")
+            for token, weight in get_product_tokens(
+                title,
+                brief_description,
+                get_feature_values(features.get(pk, [])),
+            ).items()
+        ],
+        batch_size=1000,
+    )
+
+
+def search_products(queryset, q):
+    """
+    Restrict a product queryset to matches of q, best ranked first.
+    Every query token has to prefix one of the product's tokens, the
+    rank sums the weights of the matching tokens. Both are correlated
+    subqueries, so the queryset's own filters apply before ranking.
+    """
+    tokens = tokenize_query(q)
+    if not tokens:
+        return queryset
+
+    condition = Q()
+    for token in tokens:
+        condition |= Q(token__startswith=token)
+    product_tokens = ProductSearchTokenModel.objects.filter(
+        product=OuterRef("pk")
+    )
+    for token in tokens:
+        queryset = queryset.filter(
+            Exists(product_tokens.filter(token__startswith=token))
+        )
+    rank = (
+        product_tokens.filter(condition)
+        .values("product")
+        .annotate(rank=Sum("weight"))
+        .values("rank")
+    )
+    return queryset.annotate(
+        search_rank=Subquery(rank, output_field=IntegerField())
+    ).order_by("-search_rank", "-created_date")
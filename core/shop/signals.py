@@ -1,11 +1,222 @@
-from django.core.cache import cache
+from django.db import transaction
+from django.db.models import QuerySet, Value
+from django.db.models.functions import Concat, Substr
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import ProductModel
+from .cache import bump_catalog_version, bump_feature_schema_version
+from .facets import index_product_features, reindex_option
+from .models import (
+    CategoryFeature,
+    FeatureOption,
+    ProductCategoryModel,
+    ProductFeature,
+    ProductImageModel,
+    ProductModel,
+    WishlistProductModel,
+)
+from .prices import invalidate_category_price_summary
+from .search import index_products
+from .surrogate import (
+    get_category_surrogate_key,
+    get_product_surrogate_key,
+    get_product_surrogate_keys,
+    purge_surrogate_keys,
+)
+from .tasks import generate_image_derivatives
+from .wishlist import invalidate_cached_wishlist
+
+
+def is_stock_only_save(update_fields=None, **kwargs):
+    """Orders save the stock alone, which no index or derivative uses"""
+    return update_fields is not None and set(update_fields) == {"stock"}
+
+
+def is_availability_unchanged(instance, **kwargs):
+    """A stock-only save after which the product is as available as before"""
+    return (
+        is_stock_only_save(**kwargs)
+        and not instance.has_availability_changed()
+    )
+
+
+@receiver(post_save, sender=ProductCategoryModel)
+def update_category_path(sender, instance, raw=False, **kwargs):
+    """
+    Keep the materialized path of a category and its subtree in sync.
+    Registered before every other receiver, which may rely on the path.
+    """
+    if raw:
+        return
+
+    parent_path = "/"
+    if instance.parent_id:
+        parent_path = (
+            ProductCategoryModel.objects.filter(pk=instance.parent_id)
+            .values_list("path", flat=True)
+            .first()
+        ) or "/"
+    new_path = f"{parent_path}{instance.pk}/"
+    old_path = instance.path
+    if old_path == new_path:
+        return
+
+    ProductCategoryModel.objects.filter(pk=instance.pk).update(path=new_path)
+    if old_path:
+        ProductCategoryModel.objects.filter(path__startswith=old_path).exclude(
+            pk=instance.pk
+        ).update(
+            path=Concat(Value(new_path), Substr("path", len(old_path) + 1))
+        )
+    instance.path = new_path
+
+
+@receiver(post_save, sender=ProductModel)
+@receiver(post_delete, sender=ProductModel)
+@receiver(post_save, sender=ProductCategoryModel)
+@receiver(post_delete, sender=ProductCategoryModel)
+def invalidate_category_price_summary_cache(sender, **kwargs):
+    if not is_stock_only_save(**kwargs):
+        invalidate_category_price_summary()
 
 
 @receiver(post_save, sender=ProductModel)
 @receiver(post_delete, sender=ProductModel)
-def invalidate_min_prices_cache(sender, instance, **kwargs):
-    cache.delete("min_prices_data")
+@receiver(post_save, sender=ProductFeature)
+@receiver(post_delete, sender=ProductFeature)
+@receiver(post_save, sender=ProductCategoryModel)
+@receiver(post_delete, sender=ProductCategoryModel)
+@receiver(post_save, sender=CategoryFeature)
+@receiver(post_delete, sender=CategoryFeature)
+@receiver(post_save, sender=FeatureOption)
+@receiver(post_delete, sender=FeatureOption)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """Any catalog change retires the cached product listings"""
+    if not is_availability_unchanged(instance, **kwargs):
+        bump_catalog_version()
+
+
+@receiver(post_save, sender=ProductCategoryModel)
+@receiver(post_delete, sender=ProductCategoryModel)
+@receiver(post_save, sender=CategoryFeature)
+@receiver(post_delete, sender=CategoryFeature)
+@receiver(post_save, sender=FeatureOption)
+@receiver(post_delete, sender=FeatureOption)
+def invalidate_feature_schema_cache(sender, **kwargs):
+    bump_feature_schema_version()
+
+
+@receiver(post_save, sender=ProductModel)
+@receiver(post_delete, sender=ProductModel)
+def purge_product_pages(sender, instance, **kwargs):
+    if not is_availability_unchanged(instance, **kwargs):
+        purge_surrogate_keys([get_product_surrogate_key(instance.pk)])
+
+
+@receiver(post_save, sender=ProductFeature)
+@receiver(post_delete, sender=ProductFeature)
+@receiver(post_save, sender=ProductImageModel)
+@receiver(post_delete, sender=ProductImageModel)
+def purge_product_pages_of_related(sender, instance, **kwargs):
+    purge_surrogate_keys([get_product_surrogate_key(instance.product_id)])
+
+
+@receiver(post_save, sender=FeatureOption)
+def purge_option_product_pages(sender, instance, created, **kwargs):
+    if not created:
+        purge_surrogate_keys(
+            get_product_surrogate_keys(
+                ProductFeature.objects.filter(option=instance).values_list(
+                    "product_id", flat=True
+                )
+            )
+        )
+
+
+def purge_category_pages(category):
+    """Pages of the category and its subcategories, which inherit it"""
+    category_ids = [category.pk]
+    if category.path:
+        category_ids += category.get_subtree().values_list("id", flat=True)
+    purge_surrogate_keys(get_category_surrogate_key(pk) for pk in category_ids)
+
+
+@receiver(post_save, sender=ProductCategoryModel)
+@receiver(post_delete, sender=ProductCategoryModel)
+def purge_category_pages_on_change(sender, instance, **kwargs):
+    purge_category_pages(instance)
+
+
+@receiver(post_save, sender=CategoryFeature)
+@receiver(post_delete, sender=CategoryFeature)
+def purge_category_pages_on_feature_change(sender, instance, **kwargs):
+    if category := ProductCategoryModel.objects.filter(
+        pk=instance.category_id
+    ).first():
+        purge_category_pages(category)
+
+
+@receiver(post_save, sender=ProductFeature)
+def update_product_feature_facets(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_product_features([instance])
+
+
+@receiver(post_save, sender=FeatureOption)
+def update_option_facets(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        reindex_option(instance)
+
+
+@receiver(post_save, sender=ProductModel)
+def update_product_search_tokens(sender, instance, raw=False, **kwargs):
+    if not raw and not is_stock_only_save(**kwargs):
+        index_products([instance.pk])
+
+
+@receiver(post_save, sender=ProductFeature)
+@receiver(post_delete, sender=ProductFeature)
+def update_feature_search_tokens(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Features removed along with their product need no reindexing
+    origin = kwargs.get("origin")
+    if isinstance(origin, QuerySet):
+        origin = origin.model
+    if isinstance(origin, ProductModel) or origin is ProductModel:
+        return
+    index_products([instance.product_id])
+
+
+@receiver(post_save, sender=FeatureOption)
+def update_option_search_tokens(sender, instance, created, **kwargs):
+    if not created and not kwargs.get("raw"):
+        index_products(
+            ProductFeature.objects.filter(option=instance).values_list(
+                "product_id", flat=True
+            )
+        )
+
+
+@receiver(post_save, sender=WishlistProductModel)
+@receiver(post_delete, sender=WishlistProductModel)
+def invalidate_wishlist_cache(sender, instance, **kwargs):
+    invalidate_cached_wishlist(instance.user_id)
+
+
+def schedule_image_derivatives(file, derivatives):
+    if file and derivatives.get("source") != file.name:
+        name = file.name
+        transaction.on_commit(lambda: generate_image_derivatives.delay(name))
+
+
+@receiver(post_save, sender=ProductModel)
+def update_product_image_derivatives(sender, instance, raw=False, **kwargs):
+    if not raw and not is_stock_only_save(**kwargs):
+        schedule_image_derivatives(instance.image, instance.image_derivatives)
+
+
+@receiver(post_save, sender=ProductImageModel)
+def update_gallery_image_derivatives(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_image_derivatives(instance.file, instance.derivatives)
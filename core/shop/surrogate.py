@@ -0,0 +1,139 @@
+import logging
+import urllib.request
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SURROGATE_KEY_HEADER = "Surrogate-Key"
+# Every listing built from the whole catalog carries this key
+CATALOG_SURROGATE_KEY = "catalog"
+
+SIMILAR_PRODUCTS_SURROGATE_KEY = "similar-products"
+
+
+def get_product_surrogate_key(product_id):
+    return f"product-{product_id}"
+
+
+def get_category_surrogate_key(category_id):
+    return f"category-{category_id}"
+
+
+def get_product_surrogate_keys(product_ids):
+    return [get_product_surrogate_key(pk) for pk in product_ids]
+
+
+def set_surrogate_keys(response, keys):
+    """Tag a response so the edge cache can purge it by key"""
+    keys = dict.fromkeys(
+        str(key)
+        for key in (
+            *response.get(SURROGATE_KEY_HEADER, "").split(),
+            *keys,
+        )
+    )
+    response[SURROGATE_KEY_HEADER] = " ".join(keys)
+    return response
+
+
+class SurrogateKeyMixin:
+    """Tag successful responses with the keys of what they show"""
+
+    surrogate_keys = [CATALOG_SURROGATE_KEY]
+
+    def get_surrogate_keys(self, response):
+        return self.surrogate_keys
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_surrogate_keys(response, self.get_surrogate_keys(response))
+        return response
+
+
+def is_edge_cacheable(request, response):
+    """
+    Only anonymous GET responses that carry nothing personal may be
+    shared: no session, messages or auth on the way in, no cookies
+    (including a rendered CSRF token) on the way out.
+    """
+    return (
+        request.method in ("GET", "HEAD")
+        and response.status_code == 200
+        and not response.cookies
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        and "HTTP_AUTHORIZATION" not in request.META
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def apply_edge_cache_headers(request, response):
+    if SURROGATE_KEY_HEADER not in response:
+        return response
+    if is_edge_cacheable(request, response):
+        timeout = settings.EDGE_CACHE_TIMEOUT
+        # Browsers revalidate with the ETag, the edge keeps it for timeout
+        patch_cache_control(response, public=True, max_age=0, s_maxage=timeout)
+        response["X-Accel-Expires"] = str(timeout)
+    else:
+        del response[SURROGATE_KEY_HEADER]
+        patch_cache_control(response, private=True)
+    return response
+
+
+class BaseInvalidator:
+    def purge(self, keys):
+        raise NotImplementedError
+
+
+class LocalInvalidator(BaseInvalidator):
+    """Remembers purged keys instead of sending them anywhere"""
+
+    def __init__(self):
+        self.purged = []
+
+    def purge(self, keys):
+        self.purged.extend(keys)
+
+
+class HTTPPurgeInvalidator(BaseInvalidator):
+    """
+    Sends a PURGE request with the keys in the Surrogate-Key header to
+    EDGE_CACHE_PURGE_URL, as Varnish xkey and most CDNs understand.
+    """
+
+    timeout = 2
+
+    def purge(self, keys):
+        request = urllib.request.Request(
+            settings.EDGE_CACHE_PURGE_URL,
+            method="PURGE",
+            headers={SURROGATE_KEY_HEADER: " ".join(keys)},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except OSError:
+            # The edge ttl still bounds how long the pages stay stale
+            logger.warning(
+                "Edge cache purge of %s failed", keys, exc_info=True
+            )
+
+
+@lru_cache(maxsize=None)
+def get_invalidator():
+    return import_string(settings.EDGE_CACHE_INVALIDATOR)()
+
+
+def purge_surrogate_keys(keys):
+    """Purge the keys from the edge cache once the transaction commits"""
+    keys = list(dict.fromkeys(str(key) for key in keys))
+    if keys:
+        transaction.on_commit(lambda: get_invalidator().purge(keys))
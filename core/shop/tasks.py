@@ -0,0 +1,14 @@
+from celery import shared_task
+
+from .images import build_derivatives, save_derivatives
+from .recommendations import rebuild_similar_products
+
+
+@shared_task
+def update_similar_products():
+    return rebuild_similar_products()
+
+
+@shared_task
+def generate_image_derivatives(name):
+    save_derivatives(name, build_derivatives(name))
@@ -1,52 +1,87 @@
 from django import template
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 
-from ..models import ProductModel, ProductStatusType, WishlistProductModel
+from ..cache import GRID_PAGE_CACHE_TIMEOUT, get_catalog_cache_key
+from ..models import ProductModel, ProductStatusType
+from ..recommendations import get_similar_products
+from ..wishlist import get_wished_ids, get_wishlist_ids
 
 register = template.Library()
 
+LATEST_PRODUCTS_LIMIT = 8
+# variant name -> (show wishlist button, wished)
+LATEST_PRODUCT_CARD_VARIANTS = {
+    "anonymous": (False, False),
+    "not_wished": (True, False),
+    "wished": (True, True),
+}
+
+
+def get_latest_product_cards():
+    """
+    Rendered cards of the newest products, cached under the catalog
+    version in every wishlist state so no user data is cached.
+    """
+    cache_key = get_catalog_cache_key("latest_product_cards")
+    cards = cache.get(cache_key)
+    if cards is None:
+        latest_products = (
+            ProductModel.objects.filter(status=ProductStatusType.publish.value)
+            .select_related("category")
+            .order_by("-created_date")[:LATEST_PRODUCTS_LIMIT]
+        )
+        cards = [
+            {
+                "id": product.id,
+                **{
+                    variant: render_to_string(
+                        "includes/latest-product-card.html",
+                        {
+                            "latest_product": product,
+                            "show_wishlist": show_wishlist,
+                            "is_wish": is_wish,
+                        },
+                    )
+                    for variant, (show_wishlist, is_wish) in (
+                        LATEST_PRODUCT_CARD_VARIANTS.items()
+                    )
+                },
+            }
+            for product in latest_products
+        ]
+        cache.set(cache_key, cards, GRID_PAGE_CACHE_TIMEOUT)
+    return cards
+
 
 @register.inclusion_tag("includes/latest-products.html", takes_context=True)
 def latest_products(context):
     request = context.get("request")
-    latest_products = (
-        ProductModel.objects.filter(status=ProductStatusType.publish.value)
-        .distinct()
-        .order_by("-created_date")[:8]
-    )
-    wishlist_items = (
-        WishlistProductModel.objects.filter(user=request.user).values_list(
-            "product__id", flat=True
+    cards = get_latest_product_cards()
+    if not request.user.is_authenticated:
+        variants = ["anonymous"] * len(cards)
+    else:
+        wished_ids = get_wished_ids(
+            request.user, [card["id"] for card in cards]
         )
-        if request.user.is_authenticated
-        else []
-    )
+        variants = [
+            "wished" if card["id"] in wished_ids else "not_wished"
+            for card in cards
+        ]
     return {
-        "latest_products": latest_products,
+        "latest_product_cards": [
+            mark_safe(card[variant]) for card, variant in zip(cards, variants)
+        ],
         "request": request,
-        "wishlist_items": wishlist_items,
     }
 
 
 @register.inclusion_tag("includes/similar-products.html", takes_context=True)
 def similar_products(context, product):
     request = context.get("request")
-    product_categories = product.category.all()
-    similar_prodcuts = (
-        ProductModel.objects.filter(
-            status=ProductStatusType.publish.value,
-            category__in=product_categories,
-        )
-        .distinct()
-        .exclude(id=product.id)
-        .order_by("-created_date")[:4]
-    )
-    wishlist_items = (
-        WishlistProductModel.objects.filter(user=request.user).values_list(
-            "product__id", flat=True
-        )
-        if request.user.is_authenticated
-        else []
-    )
+    similar_prodcuts = get_similar_products(product)
+    wishlist_items = get_wishlist_ids(request.user)
     return {
         "similar_prodcuts": similar_prodcuts,
         "request": request,
@@ -54,6 +89,19 @@ def similar_products(context, product):
     }
 
 
+@register.inclusion_tag("includes/product-picture.html")
+def product_picture(
+    file, sources, css_class, sizes="(min-width: 768px) 33vw, 100vw"
+):
+    """Original image with its WebP/AVIF derivatives as <source>s"""
+    return {
+        "file": file,
+        "sources": sources,
+        "css_class": css_class,
+        "sizes": sizes,
+    }
+
+
 @register.inclusion_tag("includes/category_node.html")
 def render_category(node):
     return {"node": node}
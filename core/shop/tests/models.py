@@ -1,18 +1,40 @@
+import os
+import shutil
+import tempfile
 from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from PIL import Image
 
+from order.models import OrderItemModel, OrderModel, OrderStatusType
+
+from ..cache import get_category_price_summary_cache_key
+from ..images import build_derivatives, save_derivatives
 from ..models import (
     CategoryFeature,
     FeatureOption,
     ProductCategoryModel,
+    ProductFacetModel,
+    ProductFeature,
     ProductImageModel,
     ProductModel,
+    ProductSearchTokenModel,
     ProductStatusType,
+    SimilarProductModel,
     WishlistProductModel,
 )
+from ..prices import get_category_price_summary
+from ..search import TITLE_WEIGHT, normalize_text, search_products
+from ..templatetags.shop_tags import latest_products, similar_products
 
 User = get_user_model()
 
@@ -70,6 +92,67 @@ class TestProductCategory(TestCase):
         self.assertIn(self.level1, subcategories)
         self.assertIn(self.level2, subcategories)
 
+    def test_category_path(self):
+        self.assertEqual(self.root.path, f"/{self.root.pk}/")
+        self.assertEqual(
+            self.level2.path,
+            f"/{self.root.pk}/{self.level1.pk}/{self.level2.pk}/",
+        )
+        self.assertEqual(self.level2.get_ancestors(), [self.root, self.level1])
+
+    def test_moving_category_updates_subtree_paths(self):
+        other_root = ProductCategoryModel.objects.create(
+            title="Other root", slug="other-root"
+        )
+        self.level1.parent = other_root
+        self.level1.save()
+
+        self.level2.refresh_from_db()
+        self.assertEqual(
+            self.level2.path,
+            f"/{other_root.pk}/{self.level1.pk}/{self.level2.pk}/",
+        )
+        self.assertEqual(self.root.get_all_subcategories(), [])
+        self.assertCountEqual(
+            other_root.get_all_subcategories(), [self.level1, self.level2]
+        )
+
+    def test_category_receivers_see_the_new_path(self):
+        other_root = ProductCategoryModel.objects.create(
+            title="Other root", slug="other-root"
+        )
+        paths = []
+        with mock.patch(
+            "shop.signals.bump_feature_schema_version",
+            side_effect=lambda: paths.append(
+                ProductCategoryModel.objects.get(pk=self.level2.pk).path
+            ),
+        ):
+            self.level1.parent = other_root
+            self.level1.save()
+        self.assertEqual(
+            paths, [f"/{other_root.pk}/{self.level1.pk}/{self.level2.pk}/"]
+        )
+
+    def test_get_descendants_func(self):
+        descendants = self.root.get_descendants()
+        self.assertEqual(len(descendants), 1)
+        self.assertEqual(descendants[0]["category"], self.level1)
+        self.assertEqual(
+            descendants[0]["children"],
+            [{"category": self.level2, "children": []}],
+        )
+
+    def test_rebuild_category_tree_command(self):
+        ProductCategoryModel.objects.update(path="")
+        call_command("rebuild_category_tree", stdout=StringIO())
+
+        self.level2.refresh_from_db()
+        self.assertEqual(
+            self.level2.path,
+            f"/{self.root.pk}/{self.level1.pk}/{self.level2.pk}/",
+        )
+
     def test_get_cheapest_product_price_func(self):
         user = User.objects.create_superuser(
             email="test_shop@example.com", password="TestShop123@"
@@ -106,7 +189,7 @@ class TestProductCategory(TestCase):
             discount_percent=10,
         )
         cheapest_product = self.root.get_cheapest_product_price()
-        self.assertEqual(cheapest_product, 500)
+        self.assertEqual(cheapest_product, 450)
 
     def test_get_all_features_is_required_func(self):
         CategoryFeature.objects.create(
@@ -149,6 +232,34 @@ class TestProductCategory(TestCase):
         all_features = self.level2.get_all_features()
         self.assertEqual(all_features.count(), 5)
 
+    def test_get_all_features_in_one_query_root_first(self):
+        level2_feature = CategoryFeature.objects.create(
+            category=self.level2, name="Level 2 feature"
+        )
+        root_feature = CategoryFeature.objects.create(
+            category=self.root, name="Root feature"
+        )
+        with self.assertNumQueries(1):
+            all_features = list(self.level2.get_all_features())
+        self.assertEqual(all_features, [root_feature, level2_feature])
+
+    def test_get_feature_schema_is_memoized(self):
+        cache.clear()
+        feature = CategoryFeature.objects.create(
+            category=self.level1, name="Color"
+        )
+        FeatureOption.objects.create(feature=feature, value="Red")
+        schema = self.level2.get_feature_schema()
+        self.assertEqual(schema, [feature])
+        with self.assertNumQueries(0):
+            schema = self.level2.get_feature_schema()
+            self.assertEqual(len(schema[0].options.all()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FeatureOption.objects.create(feature=feature, value="Blue")
+        schema = self.level2.get_feature_schema()
+        self.assertEqual(len(schema[0].options.all()), 2)
+
 
 class TestCategoryFeature(TestCase):
     @classmethod
@@ -217,6 +328,39 @@ class TestProduct(TestCase):
         expected_price = 80
         self.assertEqual(self.product.get_price(), expected_price)
 
+    def test_final_price_follows_save(self):
+        self.assertEqual(self.product.final_price, 80)
+        self.product.discount_percent = 50
+        self.product.save(update_fields=["discount_percent"])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.final_price, 50)
+
+    def test_stock_only_save_skips_catalog_receivers(self):
+        product = ProductModel.objects.get(pk=self.product.pk)
+        with mock.patch(
+            "shop.signals.index_products"
+        ) as index_products, mock.patch(
+            "shop.signals.bump_catalog_version"
+        ) as bump_catalog_version:
+            product.stock = 1
+            product.save(update_fields=["stock"])
+            self.assertFalse(bump_catalog_version.called)
+
+            # selling out and restocking change what the pages show
+            product.stock = 0
+            product.save(update_fields=["stock"])
+            self.assertEqual(bump_catalog_version.call_count, 1)
+            product.stock = 2
+            product.save(update_fields=["stock"])
+            self.assertEqual(bump_catalog_version.call_count, 2)
+            self.assertFalse(index_products.called)
+
+    def test_backfill_final_price_command(self):
+        ProductModel.objects.update(final_price=0)
+        call_command("backfill_final_price", stdout=StringIO())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.final_price, 80)
+
     def test_is_discounted_func(self):
         self.assertTrue(self.product.is_discounted())
 
@@ -231,7 +375,60 @@ class TestProduct(TestCase):
 
 
 class TestProductFeature(TestCase):
-    pass
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            email="test_shop@example.com", password="TestShop123@"
+        )
+        cls.category = ProductCategoryModel.objects.create(
+            title="Category test", slug="category-test"
+        )
+        cls.feature = CategoryFeature.objects.create(
+            category=cls.category, name="Color", is_required=True
+        )
+        cls.option = FeatureOption.objects.create(
+            feature=cls.feature, value="Red"
+        )
+        cls.product = ProductModel.objects.create(
+            user=cls.user,
+            category=cls.category,
+            title="Product test",
+            slug="product-test",
+            description="This is description",
+            price=100,
+        )
+
+    def test_facets_follow_product_feature_changes(self):
+        product_feature = ProductFeature.objects.create(
+            product=self.product, feature=self.feature, option=self.option
+        )
+        self.assertEqual(
+            list(product_feature.facets.values_list("value", flat=True)),
+            ["red"],
+        )
+
+        self.option.value = "Dark  Red"
+        self.option.save()
+        self.assertEqual(
+            list(product_feature.facets.values_list("value", flat=True)),
+            ["dark red"],
+        )
+
+        product_feature.delete()
+        self.assertFalse(ProductFacetModel.objects.exists())
+
+    def test_rebuild_facet_index_command(self):
+        ProductFeature.objects.create(
+            product=self.product, feature=self.feature, value="Cotton"
+        )
+        ProductFacetModel.objects.all().delete()
+        call_command("rebuild_facet_index", stdout=StringIO())
+
+        self.assertTrue(
+            ProductFacetModel.objects.filter(
+                feature=self.feature, value="cotton", product=self.product
+            ).exists()
+        )
 
 
 class TestProductImage(TestCase):
@@ -290,3 +487,514 @@ class TestWishlistProduct(TestCase):
         )
         self.assertEqual(wishlist.user, self.user)
         self.assertEqual(wishlist.product, self.product)
+
+
+class TestProductSearch(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            email="test_shop@example.com", password="TestShop123@"
+        )
+        cls.category = ProductCategoryModel.objects.create(
+            title="Category test", slug="category-test"
+        )
+        cls.feature = CategoryFeature.objects.create(
+            category=cls.category, name="Brand"
+        )
+        cls.phone = ProductModel.objects.create(
+            user=cls.user,
+            category=cls.category,
+            title="گوشی موبايل سامسونگ",
+            slug="samsung-phone",
+            description="This is description",
+            brief_description="مدل ۲۰۲۴",
+        )
+        cls.cover = ProductModel.objects.create(
+            user=cls.user,
+            category=cls.category,
+            title="قاب گوشی",
+            slug="phone-cover",
+            description="This is description",
+            brief_description="مناسب برای کودک‌ها",
+        )
+
+    def test_normalize_text(self):
+        self.assertEqual(
+            normalize_text("كتاب علي ۱۲۳ Book"), "کتاب علی 123 book"
+        )
+
+    def test_search_matches_persian_variants(self):
+        queryset = ProductModel.objects.all()
+        self.assertEqual(
+            list(search_products(queryset, "موبایل")), [self.phone]
+        )
+        self.assertEqual(list(search_products(queryset, "2024")), [self.phone])
+        self.assertEqual(
+            list(search_products(queryset, "کودکها")), [self.cover]
+        )
+        self.assertEqual(
+            list(search_products(queryset, "کودک ها")), [self.cover]
+        )
+        self.assertFalse(search_products(queryset, "لپتاپ").exists())
+
+    def test_search_ranks_title_matches_first(self):
+        ProductFeature.objects.create(
+            product=self.cover, feature=self.feature, value="سامسونگ"
+        )
+        results = list(search_products(ProductModel.objects.all(), "سامسو"))
+        self.assertEqual(results, [self.phone, self.cover])
+
+    def test_search_ranks_within_filtered_queryset(self):
+        ProductModel.objects.filter(pk=self.cover.pk).update(
+            status=ProductStatusType.publish.value
+        )
+        queryset = ProductModel.objects.filter(
+            status=ProductStatusType.publish.value
+        )
+        results = list(search_products(queryset, "گوشی"))
+        self.assertEqual(results, [self.cover])
+        self.assertEqual(results[0].search_rank, TITLE_WEIGHT)
+
+    def test_deleting_product_drops_its_tokens(self):
+        ProductFeature.objects.create(
+            product=self.cover, feature=self.feature, value="Brand"
+        )
+        self.cover.delete()
+        self.assertFalse(
+            ProductSearchTokenModel.objects.filter(
+                product_id=self.cover.pk
+            ).exists()
+        )
+
+
+class TestCategoryPriceSummary(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            email="test_shop@example.com", password="TestShop123@"
+        )
+        self.root = ProductCategoryModel.objects.create(
+            title="Root", slug="root"
+        )
+        self.first = ProductCategoryModel.objects.create(
+            title="First", slug="first", parent=self.root
+        )
+        self.second = ProductCategoryModel.objects.create(
+            title="Second", slug="second", parent=self.root
+        )
+        self.cheap = self.create_product(self.first, 100)
+        self.create_product(self.second, 300)
+        self.create_product(
+            self.second, 50, status=ProductStatusType.draft.value
+        )
+
+    def create_product(self, category, price, **kwargs):
+        return ProductModel.objects.create(
+            user=self.user,
+            category=category,
+            title=f"Product {price}",
+            slug=f"product-{price}",
+            description="This is description",
+            price=price,
+            status=kwargs.get("status", ProductStatusType.publish.value),
+        )
+
+    def test_summary_rolls_up_published_products(self):
+        summary = get_category_price_summary()
+        self.assertEqual(
+            summary[self.root.id],
+            {"min_price": 100, "max_price": 300, "count": 2},
+        )
+        self.assertEqual(summary[self.second.id]["min_price"], 300)
+
+    def test_summary_follows_product_changes(self):
+        get_category_price_summary()
+        product = ProductModel.objects.get(pk=self.cheap.pk)
+        product.category = self.second
+        product.price = 80
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+
+        # categories and grouped stats, rebuilt once for every reader
+        with self.assertNumQueries(2):
+            summary = get_category_price_summary()
+        with self.assertNumQueries(0):
+            get_category_price_summary()
+        self.assertEqual(summary[self.first.id]["count"], 0)
+        self.assertIsNone(summary[self.first.id]["min_price"])
+        self.assertEqual(summary[self.second.id]["min_price"], 80)
+        self.assertEqual(summary[self.root.id]["count"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        summary = get_category_price_summary()
+        self.assertEqual(summary[self.root.id]["min_price"], 300)
+
+    def test_stale_build_does_not_outlive_invalidation(self):
+        key = get_category_price_summary_cache_key()
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductModel.objects.filter(pk=self.cheap.pk).delete()
+        # a reader that started before the commit stores the old stats
+        cache.set(key, {self.root.id: {"min_price": 100}})
+        self.assertEqual(
+            get_category_price_summary()[self.root.id]["min_price"], 300
+        )
+
+
+class TestSimilarProducts(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            email="test_shop@example.com", password="TestShop123@"
+        )
+        cls.phones = ProductCategoryModel.objects.create(
+            title="Phones", slug="phones"
+        )
+        cls.cases = ProductCategoryModel.objects.create(
+            title="Cases", slug="cases"
+        )
+        cls.brand = CategoryFeature.objects.create(
+            category=cls.phones, name="Brand"
+        )
+        cls.phone = cls.create_product(cls.phones, "phone", "Samsung")
+        cls.other_phone = cls.create_product(cls.phones, "other", "Apple")
+        cls.same_brand = cls.create_product(cls.phones, "same", "Samsung")
+        cls.case = cls.create_product(cls.cases, "case")
+        cls.draft = cls.create_product(
+            cls.phones, "draft", status=ProductStatusType.draft.value
+        )
+
+        order = OrderModel.objects.create(
+            user=cls.user,
+            address="test address",
+            state="test state",
+            city="test city",
+            zip_code="12345",
+            status=OrderStatusType.success.value,
+        )
+        for product in (cls.phone, cls.case):
+            OrderItemModel.objects.create(
+                order=order, product=product, quantity=1, price=100
+            )
+
+    @classmethod
+    def create_product(cls, category, slug, brand=None, **kwargs):
+        product = ProductModel.objects.create(
+            user=cls.user,
+            category=category,
+            title=slug,
+            slug=slug,
+            description="This is description",
+            price=100,
+            stock=10,
+            status=kwargs.get("status", ProductStatusType.publish.value),
+        )
+        if brand:
+            ProductFeature.objects.create(
+                product=product, feature=cls.brand, value=brand
+            )
+        return product
+
+    def test_rebuild_similar_products_command(self):
+        call_command("rebuild_similar_products", stdout=StringIO())
+
+        similar = list(
+            SimilarProductModel.objects.filter(product=self.phone).values_list(
+                "similar_id", flat=True
+            )
+        )
+        self.assertEqual(
+            similar, [self.case.id, self.same_brand.id, self.other_phone.id]
+        )
+        self.assertFalse(
+            SimilarProductModel.objects.filter(similar=self.draft).exists()
+        )
+
+    def test_similar_products_tag(self):
+        call_command("rebuild_similar_products", stdout=StringIO())
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+
+        with self.assertNumQueries(1):
+            context = similar_products({"request": request}, self.phone)
+        self.assertEqual(
+            context["similar_prodcuts"],
+            [self.case, self.same_brand, self.other_phone],
+        )
+
+
+class TestLatestProductsTag(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            email="test_shop@example.com", password="TestShop123@"
+        )
+        self.category = ProductCategoryModel.objects.create(
+            title="Category test", slug="category-test"
+        )
+        self.products = [
+            ProductModel.objects.create(
+                user=self.user,
+                category=self.category,
+                title=f"Product {index}",
+                slug=f"product-{index}",
+                description="This is description",
+                price=100,
+                status=ProductStatusType.publish.value,
+            )
+            for index in range(3)
+        ]
+        WishlistProductModel.objects.create(
+            user=self.user, product=self.products[0]
+        )
+
+    def render(self, user):
+        request = RequestFactory().get("/")
+        request.user = user
+        return latest_products({"request": request})["latest_product_cards"]
+
+    def test_cards_cached_for_anonymous_users(self):
+        self.render(AnonymousUser())
+        with self.assertNumQueries(0):
+            cards = self.render(AnonymousUser())
+        self.assertEqual(len(cards), 3)
+        self.assertIn("Product 2", cards[0])
+        self.assertNotIn("addToWishlist", cards[0])
+
+    def test_wishlist_overlaid_per_user(self):
+        self.render(AnonymousUser())
+        with self.assertNumQueries(1):
+            cards = self.render(self.user)
+        self.assertIn("addToWishlist", cards[2])
+        self.assertIn(" active ", cards[2])
+        self.assertNotIn(" active ", cards[0])
+
+
+class TestImageDerivatives(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        self.user = User.objects.create_superuser(
+            email="test_shop@example.com", password="TestShop123@"
+        )
+        self.category = ProductCategoryModel.objects.create(
+            title="Category test", slug="category-test"
+        )
+        self.image = self.save_image("product/img/photo.png", (800, 400))
+        self.product = ProductModel.objects.create(
+            user=self.user,
+            category=self.category,
+            title="Product test",
+            slug="product-test",
+            description="This is description",
+            image=self.image,
+            price=100,
+            status=ProductStatusType.publish.value,
+        )
+
+    def save_image(self, name, size):
+        buffer = BytesIO()
+        Image.new("RGB", size, "red").save(buffer, format="PNG")
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def test_build_derivatives(self):
+        derivatives = build_derivatives(self.image)
+
+        self.assertEqual(derivatives["source"], self.image)
+        self.assertEqual(list(derivatives["webp"]), ["160", "320", "640"])
+        with default_storage.open(derivatives["webp"]["320"]) as file:
+            self.assertEqual(Image.open(file).size, (320, 160))
+
+    def test_derivatives_are_content_addressed(self):
+        copy = self.save_image("product/img/copy.png", (800, 400))
+        self.assertEqual(
+            build_derivatives(self.image)["webp"],
+            build_derivatives(copy)["webp"],
+        )
+
+    def test_small_images_are_not_upscaled(self):
+        small = self.save_image("product/img/small.png", (200, 100))
+        self.assertEqual(
+            list(build_derivatives(small)["webp"]), ["160", "200"]
+        )
+
+    def test_sources_follow_current_image(self):
+        save_derivatives(self.image, build_derivatives(self.image))
+        self.product.refresh_from_db()
+
+        (mime_type, srcset), *_ = self.product.get_image_sources()
+        self.assertEqual(mime_type, "image/webp")
+        self.assertIn(" 640w", srcset)
+
+        self.product.image = self.save_image("product/img/new.png", (10, 10))
+        self.assertEqual(self.product.get_image_sources(), [])
+
+    def test_backfill_command(self):
+        gallery_image = ProductImageModel.objects.create(
+            product=self.product,
+            file=self.save_image("product/extra-img/side.png", (400, 400)),
+        )
+
+        call_command("generate_image_derivatives", stdout=StringIO())
+
+        self.product.refresh_from_db()
+        gallery_image.refresh_from_db()
+        self.assertTrue(self.product.get_image_derivative_urls())
+        self.assertEqual(
+            list(gallery_image.get_derivative_urls()["webp"]),
+            ["160", "320", "400"],
+        )
+
+    def test_backfill_skips_missing_files(self):
+        ProductImageModel.objects.create(
+            product=self.product, file="product/extra-img/missing.png"
+        )
+        stderr = StringIO()
+
+        call_command(
+            "generate_image_derivatives", stdout=StringIO(), stderr=stderr
+        )
+
+        self.assertIn("missing.png", stderr.getvalue())
+        self.product.refresh_from_db()
+        self.assertTrue(self.product.get_image_derivative_urls())
+
+
+class TestImportProducts(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            email="test_shop@example.com", password="TestShop123@"
+        )
+        self.parent = ProductCategoryModel.objects.create(
+            title="Books", slug="books"
+        )
+        self.category = ProductCategoryModel.objects.create(
+            title="Novels", slug="novels", parent=self.parent
+        )
+        self.cover = CategoryFeature.objects.create(
+            category=self.parent, name="cover"
+        )
+        self.hardcover = FeatureOption.objects.create(
+            feature=self.cover, value="Hardcover"
+        )
+        self.pages = CategoryFeature.objects.create(
+            category=self.category, name="pages"
+        )
+        ProductModel.objects.create(
+            user=self.user,
+            category=self.category,
+            title="Existing",
+            slug="book",
+            description="This is description",
+            price=100,
+            status=ProductStatusType.publish.value,
+        )
+
+    def import_products(self, content, suffix, **kwargs):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, encoding="utf-8", delete=False
+        ) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "import_products",
+            file.name,
+            user=self.user.email,
+            stdout=stdout,
+            stderr=stderr,
+            **kwargs,
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_csv(self):
+        stdout, stderr = self.import_products(
+            "title,slug,category,price,discount_percent,status,"
+            "feature:cover,feature:pages\n"
+            "Book one,book,novels,1000,10,publish,hardcover,320\n"
+            "Book two,book,novels,2000,0,1,,\n"
+            "Book three,,missing,3000,0,1,,\n",
+            ".csv",
+            chunk_size=1,
+        )
+
+        self.assertIn("2 products imported and 1 rows skipped", stdout)
+        self.assertIn("Row 3 skipped: unknown category", stderr)
+        book = ProductModel.objects.get(title="Book one")
+        self.assertEqual(book.slug, "book-2")
+        self.assertEqual(book.final_price, 900)
+        self.assertEqual(book.status, ProductStatusType.publish.value)
+        self.assertEqual(
+            ProductModel.objects.get(title="Book two").slug, "book-3"
+        )
+        self.assertEqual(
+            {
+                (feature.feature_id, feature.option_id, feature.value)
+                for feature in book.features.all()
+            },
+            {
+                (self.cover.id, self.hardcover.id, None),
+                (self.pages.id, None, "320"),
+            },
+        )
+        self.assertTrue(
+            ProductFacetModel.objects.filter(
+                product=book, feature=self.pages, value="320"
+            ).exists()
+        )
+        self.assertEqual(
+            list(search_products(ProductModel.objects.all(), "one")), [book]
+        )
+
+    def test_import_jsonl(self):
+        stdout, stderr = self.import_products(
+            '{"title": "Book one", "category": "novels", "price": 500, '
+            '"features": {"cover": "Hardcover"}}\n'
+            "not json\n"
+            '{"title": "Book two", "category": "novels", '
+            '"features": {"color": "red"}}\n',
+            ".jsonl",
+        )
+
+        self.assertIn("1 products imported and 2 rows skipped", stdout)
+        self.assertIn("unknown feature 'color'", stderr)
+        book = ProductModel.objects.get(title="Book one")
+        self.assertEqual(book.status, ProductStatusType.draft.value)
+        self.assertEqual(book.features.get().option, self.hardcover)
+
+    def test_import_rejects_out_of_range_numbers(self):
+        stdout, stderr = self.import_products(
+            "title,category,price,discount_percent,stock\n"
+            "Negative stock,novels,100,0,-1\n"
+            "Huge price,novels,99999999999,0,1\n"
+            "Big discount,novels,100,150,1\n"
+            "Not a number,novels,NaN,0,1\n"
+            "Fine,novels,100,0,3\n",
+            ".csv",
+        )
+
+        self.assertIn("1 products imported and 4 rows skipped", stdout)
+        self.assertIn("invalid stock '-1'", stderr)
+        self.assertIn("invalid price '99999999999'", stderr)
+        self.assertIn("invalid discount_percent '150'", stderr)
+        self.assertIn("invalid price 'NaN'", stderr)
+        self.assertEqual(ProductModel.objects.get(title="Fine").stock, 3)
+
+    def test_import_refreshes_price_summary(self):
+        self.assertEqual(
+            get_category_price_summary()[self.category.id]["min_price"], 100
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.import_products(
+                '{"title": "Cheap", "category": "novels", "price": 50, '
+                '"status": "publish"}\n',
+                ".jsonl",
+            )
+        self.assertEqual(
+            get_category_price_summary()[self.category.id]["min_price"], 50
+        )
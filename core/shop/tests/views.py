@@ -1,21 +1,42 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+import base64
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, RequestFactory, TestCase
+from django.http import QueryDict
 from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
 
 from accounts.models import UserType
 from review.models import ReviewModel, ReviewStatusType
+from shop.api.v1.serializers import (
+    ProductListSerializer,
+    ProductListValuesSerializer,
+)
+from shop.cache import get_catalog_version
+from shop.facets import get_option_counts
 from shop.models import (
+    CategoryFeature,
+    FeatureOption,
     ProductCategoryModel,
+    ProductFeature,
     ProductModel,
     ProductStatusType,
     WishlistProductModel,
 )
+from shop.surrogate import get_invalidator
+from shop.wishlist import get_wishlist_cache_key
 
 User = get_user_model()
 
 
 class ShopProductGridViewTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.url = reverse("shop:product-grid")
 
@@ -111,24 +132,82 @@ class ShopProductGridViewTest(TestCase):
         self.assertEqual(len(resp_q.context["object_list"]), 1)
         self.assertEqual(resp_q.context["object_list"][0], self.product2)
 
+        # price filters apply to the discounted price (product2 costs 98)
         resp_price = self.client.get(f"{self.url}?min_price=100&max_price=200")
-        self.assertCountEqual(
-            resp_price.context["object_list"], [self.product2, self.product4]
+        self.assertEqual(
+            list(resp_price.context["object_list"]), [self.product4]
         )
 
         resp_order = self.client.get(f"{self.url}?order_by=-price")
         prices = [p.price for p in resp_order.context["object_list"]]
         self.assertEqual(prices, [300, 200, 150, 50])
 
+    def test_queryset_filters_by_features(self):
+        feature = CategoryFeature.objects.create(
+            category=self.parent_category, name="Color"
+        )
+        size = CategoryFeature.objects.create(
+            category=self.parent_category, name="Size"
+        )
+        red = FeatureOption.objects.create(feature=feature, value="Red")
+        blue = FeatureOption.objects.create(feature=feature, value="Blue")
+        ProductFeature.objects.create(
+            product=self.product1, feature=feature, option=red
+        )
+        ProductFeature.objects.create(
+            product=self.product2, feature=feature, option=blue
+        )
+        ProductFeature.objects.create(
+            product=self.product3, feature=feature, option=red
+        )
+        ProductFeature.objects.create(
+            product=self.product3, feature=size, value="XL"
+        )
+
+        response = self.client.get(f"{self.url}?feature_{feature.id}=Red")
+        self.assertCountEqual(
+            response.context["object_list"], [self.product1, self.product3]
+        )
+
+        response = self.client.get(
+            f"{self.url}?feature_{feature.id}=Red&feature_{feature.id}=Blue"
+        )
+        self.assertEqual(len(response.context["object_list"]), 3)
+
+        response = self.client.get(
+            f"{self.url}?feature_{feature.id}=Red&feature_{size.id}=xl"
+        )
+        self.assertEqual(
+            list(response.context["object_list"]), [self.product3]
+        )
+
     def test_page_size_via_queryparam(self):
         resp = self.client.get(f"{self.url}?page_size=2")
         self.assertEqual(len(resp.context["object_list"]), 2)
         self.assertEqual(resp.context["total_items"], 4)
 
+    def test_result_page_served_from_cache(self):
+        self.client.get(f"{self.url}?order_by=-price")
+        with self.assertNumQueries(0):
+            response = self.client.get(f"{self.url}?order_by=-price")
+        self.assertEqual(response.context["total_items"], 4)
+        self.assertEqual(response.context["object_list"][0], self.product3)
+
+    def test_catalog_change_invalidates_cached_pages(self):
+        self.client.get(self.url)
+        self.product1.status = ProductStatusType.draft.value
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product1.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["total_items"], 3)
+        self.assertNotIn(self.product1, response.context["object_list"])
+
     def test_price_filter(self):
         response = self.client.get(f"{self.url}?min_price=50&max_price=100")
-        self.assertEqual(len(response.context["object_list"]), 1)
-        self.assertEqual(response.context["object_list"][0].title, "First")
+        self.assertCountEqual(
+            response.context["object_list"], [self.product1, self.product2]
+        )
 
 
 class ShopProductDetailViewTest(TestCase):
@@ -374,3 +453,694 @@ class CategoriesSidebarViewTest(TestCase):
 
         created_dates = [p.created_date for p in popular_products]
         self.assertEqual(created_dates, sorted(created_dates, reverse=True))
+
+
+class ProductFacetCountAPITest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("shop:api-v1:product-grid-facets")
+        cache.clear()
+
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            password="Admin123/",
+            type=UserType.admin.value,
+        )
+        self.parent_category = ProductCategoryModel.objects.create(
+            title="Parent Category", slug="parent-category"
+        )
+        self.category = ProductCategoryModel.objects.create(
+            title="Category", slug="category", parent=self.parent_category
+        )
+        self.feature = CategoryFeature.objects.create(
+            category=self.parent_category, name="Color"
+        )
+        self.red = FeatureOption.objects.create(
+            feature=self.feature, value="Red"
+        )
+        self.blue = FeatureOption.objects.create(
+            feature=self.feature, value="Blue"
+        )
+        for index, (option, price) in enumerate(
+            [(self.red, 50000), (self.red, 200000), (self.blue, 200000)]
+        ):
+            product = ProductModel.objects.create(
+                user=self.admin,
+                category=self.category,
+                title=f"Product {index}",
+                slug=f"product-{index}",
+                description="This is description",
+                price=price,
+                status=ProductStatusType.publish.value,
+            )
+            ProductFeature.objects.create(
+                product=product, feature=self.feature, option=option
+            )
+
+    def test_facet_counts(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual(
+            data["features"][0]["options"],
+            [
+                {"value": "blue", "label": "Blue", "count": 1},
+                {"value": "red", "label": "Red", "count": 2},
+            ],
+        )
+        self.assertEqual(data["price"]["total"], 3)
+        self.assertEqual(data["price"]["buckets"][0]["count"], 1)
+        self.assertEqual(data["price"]["buckets"][1]["count"], 2)
+        self.assertCountEqual(
+            data["categories"],
+            [
+                {"category_id": self.parent_category.id, "count": 3},
+                {"category_id": self.category.id, "count": 3},
+            ],
+        )
+
+    def test_selected_feature_keeps_sibling_counts(self):
+        response = self.client.get(
+            f"{self.url}?feature_{self.feature.id}=Red&max_price=100000"
+        )
+        data = response.json()
+
+        options = {
+            option["value"]: option["count"]
+            for option in data["features"][0]["options"]
+        }
+        self.assertEqual(options, {"red": 1})
+        self.assertEqual(data["price"]["total"], 1)
+        self.assertEqual(data["price"]["buckets"][1]["count"], 1)
+
+    def test_feature_counts_are_one_grouped_query(self):
+        size = CategoryFeature.objects.create(
+            category=self.parent_category, name="Size"
+        )
+        for product, value in zip(
+            ProductModel.objects.order_by("id"), ["L", "S", "L"]
+        ):
+            ProductFeature.objects.create(
+                product=product, feature=size, value=value
+            )
+        params = QueryDict(
+            f"feature_{self.feature.id}=Red&feature_{size.id}=L"
+        )
+        queryset = ProductModel.objects.filter(
+            status=ProductStatusType.publish.value
+        )
+        # postings, counts and option labels
+        with self.assertNumQueries(3):
+            features = get_option_counts(queryset, params)
+
+        counts = {
+            feature["feature_id"]: {
+                option["value"]: option["count"]
+                for option in feature["options"]
+            }
+            for feature in features
+        }
+        self.assertEqual(
+            counts,
+            {
+                self.feature.id: {"red": 1, "blue": 1},
+                size.id: {"l": 1, "s": 1},
+            },
+        )
+
+
+class ProductGridAPICursorPaginationTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("shop:api-v1:product-grid")
+
+        self.admin = User.objects.create_user(
+            email="admin@example.com",
+            password="Admin123/",
+            type=UserType.admin.value,
+        )
+        self.category = ProductCategoryModel.objects.create(
+            title="Category", slug="category"
+        )
+        self.products = [
+            ProductModel.objects.create(
+                user=self.admin,
+                category=self.category,
+                title=f"Product {index}",
+                slug=f"product-{index}",
+                description="This is description",
+                price=100 * (index % 3 + 1),
+                status=ProductStatusType.publish.value,
+            )
+            for index in range(7)
+        ]
+
+    def get_slugs(self, response):
+        return [product["slug"] for product in response.json()["results"]]
+
+    def test_cursor_walks_all_pages_without_count(self):
+        response = self.client.get(
+            self.url, {"pagination": "cursor", "page_size": 3}
+        )
+        self.assertEqual(response.status_code, 200)
+        pagination = response.json()["pagination"]
+        self.assertIsNone(pagination["total_items"])
+        self.assertIsNone(pagination["previous"])
+
+        slugs = self.get_slugs(response)
+        while pagination["next"]:
+            response = self.client.get(pagination["next"])
+            pagination = response.json()["pagination"]
+            slugs += self.get_slugs(response)
+
+        expected = ProductModel.objects.order_by("-created_date", "-id")
+        self.assertEqual(slugs, [product.slug for product in expected])
+
+    def test_cursor_follows_ordering_and_previous_link(self):
+        params = {"pagination": "cursor", "page_size": 2, "order_by": "price"}
+        first = self.client.get(self.url, params).json()
+        second = self.client.get(first["pagination"]["next"]).json()
+        previous = self.client.get(second["pagination"]["previous"]).json()
+
+        expected = [
+            product.slug
+            for product in ProductModel.objects.order_by("price", "id")
+        ]
+        self.assertEqual(
+            [product["slug"] for product in first["results"]], expected[:2]
+        )
+        self.assertEqual(
+            [product["slug"] for product in second["results"]], expected[2:4]
+        )
+        self.assertEqual(previous["results"], first["results"])
+        self.assertIsNone(previous["pagination"]["previous"])
+
+    def test_count_only_when_requested(self):
+        response = self.client.get(
+            self.url, {"pagination": "cursor", "count": "true"}
+        )
+        self.assertEqual(response.json()["pagination"]["total_items"], 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_invalid_position(self):
+        for position in (
+            ["abc", "x"],
+            [{"a": 1}, 1],
+            ["2020-01-01", "zz"],
+            [None, 1],
+        ):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps(
+                    {"o": ["-created_date", "-id"], "p": position, "r": False}
+                ).encode()
+            ).decode()
+            response = self.client.get(self.url, {"cursor": cursor})
+            self.assertEqual(response.status_code, 404, position)
+
+
+class ProductGridAPICacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse("shop:api-v1:product-grid")
+
+        self.user = User.objects.create_user(
+            email="user@example.com", password="User123/"
+        )
+        self.category = ProductCategoryModel.objects.create(
+            title="Category", slug="category"
+        )
+        self.product = ProductModel.objects.create(
+            user=self.user,
+            category=self.category,
+            title="Product",
+            slug="product",
+            description="This is description",
+            price=100,
+            status=ProductStatusType.publish.value,
+        )
+        WishlistProductModel.objects.create(
+            user=self.user, product=self.product
+        )
+
+    def test_wishlist_overlaid_on_cached_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertTrue(response.json()["results"][0]["is_wish"])
+
+        self.client.logout()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertFalse(response.json()["results"][0]["is_wish"])
+
+    def test_catalog_change_invalidates_cached_pages(self):
+        self.client.get(self.url)
+        self.product.title = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()["results"][0]["title"], "Renamed")
+
+    def test_catalog_version_moves_on_commit(self):
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+            # a page built now still reads the old rows
+            self.assertEqual(get_catalog_version(), version)
+        self.assertNotEqual(get_catalog_version(), version)
+
+    def test_wishlist_toggle_updates_cached_page(self):
+        self.client.force_login(self.user)
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("shop:api-v1:add-or-remove-wishlist"),
+                {"product_id": self.product.id},
+            )
+        response = self.client.get(self.url)
+        self.assertFalse(response.json()["results"][0]["is_wish"])
+
+
+class WishlistCheckAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse("shop:api-v1:wishlist-check")
+
+        self.user = User.objects.create_user(
+            email="user@example.com", password="User123/"
+        )
+        self.category = ProductCategoryModel.objects.create(
+            title="Category", slug="category"
+        )
+        self.products = [
+            ProductModel.objects.create(
+                user=self.user,
+                category=self.category,
+                title=f"Product {index}",
+                slug=f"product-{index}",
+                description="This is description",
+                price=100,
+                status=ProductStatusType.publish.value,
+            )
+            for index in range(3)
+        ]
+        WishlistProductModel.objects.create(
+            user=self.user, product=self.products[0]
+        )
+        self.ids = ",".join(str(product.id) for product in self.products)
+
+    def test_check_returns_wished_ids(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {"ids": self.ids})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["wished_ids"], [self.products[0].id])
+
+    def test_check_served_from_cached_set(self):
+        self.client.force_login(self.user)
+        self.client.get(self.url, {"ids": self.ids})
+
+        with self.assertNumQueries(1):
+            # the user lookup only
+            response = self.client.get(self.url, {"ids": self.ids})
+        self.assertEqual(response.json()["wished_ids"], [self.products[0].id])
+
+    def test_check_rebuilds_set_after_change(self):
+        self.client.force_login(self.user)
+        self.client.get(self.url, {"ids": self.ids})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WishlistProductModel.objects.create(
+                user=self.user, product=self.products[1]
+            )
+            WishlistProductModel.objects.filter(
+                user=self.user, product=self.products[0]
+            ).delete()
+        with self.assertNumQueries(2):
+            # the user lookup and the rebuilt set
+            response = self.client.get(self.url, {"ids": self.ids})
+        self.assertEqual(response.json()["wished_ids"], [self.products[1].id])
+
+    def test_check_rebuilds_evicted_set(self):
+        self.client.force_login(self.user)
+        self.client.get(self.url, {"ids": self.ids})
+        cache.delete(get_wishlist_cache_key(self.user.id))
+
+        response = self.client.get(self.url, {"ids": self.ids})
+        self.assertEqual(response.json()["wished_ids"], [self.products[0].id])
+
+    def test_check_anonymous(self):
+        response = self.client.get(self.url, {"ids": self.ids})
+        self.assertEqual(response.json()["wished_ids"], [])
+
+    def test_check_invalid_ids(self):
+        response = self.client.get(self.url, {"ids": "1,a"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductListValuesSerializerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="user@example.com", password="User123/"
+        )
+        self.category = ProductCategoryModel.objects.create(
+            title="دسته", slug="دسته-تست"
+        )
+        for index, (title, slug, brief_description) in enumerate(
+            [
+                ("Product", "product", "Brief"),
+                ("محصول", "محصول-تست", None),
+            ]
+        ):
+            ProductModel.objects.create(
+                user=self.user,
+                category=self.category,
+                title=title,
+                slug=slug,
+                image=f"product/img/تصویر {index}.png",
+                brief_description=brief_description,
+                description="This is description",
+                price=999 + index,
+                discount_percent=15,
+                avg_rate=4.5,
+                status=ProductStatusType.publish.value,
+            )
+        ProductModel.objects.filter(slug="product").update(
+            image_derivatives={
+                "source": "product/img/تصویر 0.png",
+                "webp": {"160": "derivatives/ab/abc/160.webp"},
+            }
+        )
+        self.queryset = ProductModel.objects.select_related("category")
+
+    def render_both(self, request):
+        expected = ProductListSerializer(
+            self.queryset, many=True, context={"request": request}
+        ).data
+        actual = ProductListValuesSerializer(request).serialize(
+            self.queryset.values(*ProductListValuesSerializer.value_fields)
+        )
+        return JSONRenderer().render(expected), JSONRenderer().render(actual)
+
+    def test_identical_output(self):
+        request = Request(RequestFactory().get("/"))
+        expected, actual = self.render_both(request)
+        self.assertEqual(expected, actual)
+        self.assertIn(b"derivatives/ab/abc/160.webp", actual)
+
+    def test_identical_output_without_request(self):
+        expected, actual = self.render_both(None)
+        self.assertEqual(expected, actual)
+
+    def test_grid_api_uses_fast_path(self):
+        response = self.client.get(reverse("shop:api-v1:product-grid"))
+        expected = ProductListSerializer(
+            self.queryset,
+            many=True,
+            context={"request": response.wsgi_request},
+        ).data
+        self.assertEqual(
+            response.json()["results"],
+            json.loads(JSONRenderer().render(expected)),
+        )
+
+    def test_benchmark_command(self):
+        stdout = StringIO()
+        call_command("benchmark_product_serializers", rounds=1, stdout=stdout)
+        self.assertIn("output is identical", stdout.getvalue())
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email="user@example.com", password="User123/"
+        )
+        self.category = ProductCategoryModel.objects.create(
+            title="Category", slug="category"
+        )
+        self.product = ProductModel.objects.create(
+            user=self.user,
+            category=self.category,
+            title="Product",
+            slug="product",
+            description="This is description",
+            price=100,
+            status=ProductStatusType.publish.value,
+        )
+        self.api_url = reverse(
+            "shop:api-v1:product-detail", kwargs={"slug": "product"}
+        )
+        self.page_url = reverse(
+            "shop:product-detail", kwargs={"slug": "product"}
+        )
+
+    def test_product_api_not_modified(self):
+        response = self.client.get(self.api_url)
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.api_url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_product_api_not_modified_since(self):
+        response = self.client.get(self.api_url)
+        response = self.client.get(
+            self.api_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_product_api_etag_follows_reviews(self):
+        etag = self.client.get(self.api_url)["ETag"]
+        review = ReviewModel.objects.create(
+            product=self.product,
+            user=self.user,
+            description="Review",
+            rate=5,
+            status=ReviewStatusType.accepted.value,
+        )
+        response = self.client.get(self.api_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        review.description = "Edited review"
+        review.save()
+        response = self.client.get(self.api_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_api_etag_follows_wishlist(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.api_url)
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WishlistProductModel.objects.create(
+                user=self.user, product=self.product
+            )
+        response = self.client.get(
+            self.api_url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["is_wish"])
+
+    def test_draft_product_has_no_validators(self):
+        self.product.status = ProductStatusType.draft.value
+        self.product.save()
+        response = self.client.get(self.api_url)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_product_page_not_modified(self):
+        etag = self.client.get(self.page_url)["ETag"]
+        response = self.client.get(self.page_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.force_login(self.user)
+        response = self.client.get(self.page_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_sidebar_api_etag_follows_catalog(self):
+        url = reverse("shop:api-v1:categories-sidebar")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductCategoryModel.objects.create(title="New", slug="new")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_category_feature_api_not_modified(self):
+        url = reverse("shop:api-v1:category-feature-list")
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class CategoryFeatureAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse("shop:api-v1:category-feature-list")
+        self.root = ProductCategoryModel.objects.create(
+            title="Root", slug="root"
+        )
+        self.category = ProductCategoryModel.objects.create(
+            title="Category", slug="category", parent=self.root
+        )
+        self.brand = CategoryFeature.objects.create(
+            category=self.root, name="Brand"
+        )
+        self.color = CategoryFeature.objects.create(
+            category=self.category, name="Color", is_required=False
+        )
+        for feature in (self.brand, self.color):
+            for value in ("A", "B"):
+                FeatureOption.objects.create(feature=feature, value=value)
+
+    def test_inherited_features_root_first(self):
+        response = self.client.get(self.url, {"category_id": self.category.id})
+        self.assertEqual(
+            [feature["name"] for feature in response.json()],
+            ["Brand", "Color"],
+        )
+        self.assertEqual(len(response.json()[0]["options"]), 2)
+
+    def test_constant_number_of_queries(self):
+        for name in ("Size", "Material", "Weight"):
+            feature = CategoryFeature.objects.create(
+                category=self.category, name=name
+            )
+            FeatureOption.objects.create(feature=feature, value="X")
+        # category path, features and their options
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {"category_id": self.category.id})
+
+    def test_response_is_cached_until_features_change(self):
+        params = {"category_id": self.category.id, "is_required": "true"}
+        self.client.get(self.url, params)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, params)
+        self.assertEqual(len(response.json()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FeatureOption.objects.create(feature=self.brand, value="C")
+        response = self.client.get(self.url, params)
+        self.assertEqual(len(response.json()[0]["options"]), 3)
+
+
+class EdgeCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_invalidator().purged.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email="user@example.com", password="User123/"
+        )
+        self.category = ProductCategoryModel.objects.create(
+            title="Category", slug="category"
+        )
+        self.product = ProductModel.objects.create(
+            user=self.user,
+            category=self.category,
+            title="Product",
+            slug="product",
+            description="This is description",
+            price=100,
+            status=ProductStatusType.publish.value,
+        )
+        self.detail_url = reverse(
+            "shop:api-v1:product-detail", kwargs={"slug": "product"}
+        )
+
+    def test_anonymous_api_response_is_public(self):
+        response = self.client.get(reverse("shop:api-v1:product-grid"))
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("s-maxage=60", response["Cache-Control"])
+        self.assertEqual(
+            response["Surrogate-Key"].split(),
+            ["catalog", f"product-{self.product.id}"],
+        )
+
+    def test_product_api_surrogate_keys(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(
+            response["Surrogate-Key"].split(),
+            [f"product-{self.product.id}", f"category-{self.category.id}"],
+        )
+
+    def test_authenticated_response_is_private(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.detail_url)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertFalse(response.has_header("Surrogate-Key"))
+
+    def test_anonymous_page_is_public(self):
+        response = self.client.get(
+            reverse("shop:product-detail", kwargs={"slug": "product"})
+        )
+        self.assertFalse(response.cookies)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn(
+            f"product-{self.product.id}", response["Surrogate-Key"].split()
+        )
+
+    def test_page_of_visitor_with_cart_is_private(self):
+        ProductModel.objects.filter(pk=self.product.pk).update(stock=5)
+        self.client.post(
+            reverse("cart:session-add-product"),
+            {"product_id": self.product.id},
+        )
+        response = self.client.get(
+            reverse("shop:product-detail", kwargs={"slug": "product"})
+        )
+        self.assertIn("private", response["Cache-Control"])
+        self.assertFalse(response.has_header("Surrogate-Key"))
+
+    def test_product_change_purges_its_pages(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.title = "New title"
+            self.product.save()
+        self.assertIn(f"product-{self.product.id}", get_invalidator().purged)
+        self.assertIn("catalog", get_invalidator().purged)
+
+    def test_category_change_purges_subcategory_pages(self):
+        subcategory = ProductCategoryModel.objects.create(
+            title="Subcategory", slug="subcategory", parent=self.category
+        )
+        get_invalidator().purged.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoryFeature.objects.create(
+                category=self.category, name="Color"
+            )
+        self.assertIn(f"category-{self.category.id}", get_invalidator().purged)
+        self.assertIn(f"category-{subcategory.id}", get_invalidator().purged)
+
+    def test_personalization(self):
+        self.client.force_login(self.user)
+        WishlistProductModel.objects.create(
+            user=self.user, product=self.product
+        )
+        response = self.client.get(
+            reverse("shop:api-v1:personalization"),
+            {"ids": f"{self.product.id},999"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["is_authenticated"])
+        self.assertEqual(response.json()["cart_total_quantity"], 0)
+        self.assertEqual(response.json()["wished_ids"], [self.product.id])
+        self.assertTrue(response.json()["csrf_token"])
+        self.assertIn("csrftoken", response.cookies)
+        self.assertIn("no-store", response["Cache-Control"])
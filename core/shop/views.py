@@ -1,27 +1,53 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.cache import cache
-from django.db.models import Count, Exists, OuterRef, Prefetch, Q
+from django.core.paginator import Page
+from django.db.models import Prefetch
 from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import DetailView, ListView, TemplateView, View
 
-from review.models import ReviewModel, ReviewStatusType
+from review.models import ReviewModel, ReviewStatsModel, ReviewStatusType
 
+from .cache import GRID_PAGE_CACHE_TIMEOUT, get_catalog_cache_key
+from .conditional import get_product_page_etag
+from .facets import (
+    filter_products,
+    get_filter_signature,
+    get_product_ordering,
+)
 from .models import (
     ProductCategoryModel,
-    ProductFeature,
     ProductModel,
     ProductStatusType,
     WishlistProductModel,
 )
+from .prices import get_category_price_summary
+from .surrogate import (
+    CATALOG_SURROGATE_KEY,
+    SIMILAR_PRODUCTS_SURROGATE_KEY,
+    SurrogateKeyMixin,
+    get_category_surrogate_key,
+    get_product_surrogate_key,
+    get_product_surrogate_keys,
+)
 
 
-class ShopProductGridView(ListView):
+class ShopProductGridView(SurrogateKeyMixin, ListView):
     template_name = "shop/products-grid.html"
     paginate_by = 9
 
+    def get_surrogate_keys(self, response):
+        return [
+            CATALOG_SURROGATE_KEY,
+            *get_product_surrogate_keys(
+                product.id for product in response.context_data["object_list"]
+            ),
+        ]
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["total_items"] = self.object_list.count()
+        context["total_items"] = context["paginator"].count
         context["categories"] = ProductCategoryModel.objects.all()
 
         current_filters = self.request.GET.copy()
@@ -34,108 +60,108 @@ class ShopProductGridView(ListView):
             selected_category = ProductCategoryModel.objects.get(
                 id=selected_category_id
             )
-            context["features"] = (
-                selected_category.get_all_features_is_required()
-            )
+            context["features"] = [
+                feature
+                for feature in selected_category.get_feature_schema()
+                if feature.is_required
+            ]
         else:
             context["features"] = []
 
         return context
 
+    def get(self, request, *args, **kwargs):
+        self.cached_page = cache.get(self.get_page_cache_key())
+        return super().get(request, *args, **kwargs)
+
+    def get_page_cache_key(self):
+        return get_catalog_cache_key(
+            "product_grid_page",
+            get_filter_signature(self.request.GET, ignore=()),
+        )
+
     def get_queryset(self):
+        if self.cached_page is not None:
+            # the cached page already holds the filtered results
+            return ProductModel.objects.none()
+
         queryset = ProductModel.objects.filter(
             status=ProductStatusType.publish.value
-        )
+        ).select_related("category")
 
-        category_id = self.request.GET.get("category_id")
-        if category_id:
-            category = ProductCategoryModel.objects.filter(
-                id=category_id
-            ).first()
-            if category:
-                if category.parent is None:
-                    subcategories = list(category.get_all_subcategories())
-                    subcategories.append(category)
-                    queryset = queryset.filter(category__in=subcategories)
-                else:
-                    queryset = queryset.filter(category=category)
-
-        if q := self.request.GET.get("q"):
-            queryset = queryset.filter(title__icontains=q)
-
-        if min_price := self.request.GET.get("min_price"):
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price := self.request.GET.get("max_price"):
-            queryset = queryset.filter(price__lte=max_price)
-
-        for key, values in self.request.GET.lists():
-            if key.startswith("feature_"):
-                feature_id = key.split("_")[1]
-                values = [v for v in values if v.strip()]
-
-                if not values:
-                    continue
-
-                subquery = ProductFeature.objects.filter(
-                    product_id=OuterRef("id"), feature_id=feature_id
-                ).filter(Q(option__value__in=values) | Q(value__in=values))
-
-                queryset = queryset.annotate(
-                    **{f"has_feature_{feature_id}": Exists(subquery)}
-                )
-                queryset = queryset.filter(
-                    **{f"has_feature_{feature_id}": True}
-                )
+        queryset = filter_products(queryset, self.request.GET)
 
         if order_by := self.request.GET.get("order_by"):
-            queryset = queryset.order_by(order_by)
+            queryset = queryset.order_by(get_product_ordering(order_by))
 
+        return queryset
+
+    def get_paginate_by(self, queryset):
         if page_size := self.request.GET.get("page_size"):
-            self.paginate_by = int(page_size)
+            return int(page_size)
+        return self.paginate_by
+
+    def paginate_queryset(self, queryset, page_size):
+        """Serve result pages and their count from the catalog cache"""
+        if self.cached_page is None:
+            paginator, page, object_list, is_paginated = (
+                super().paginate_queryset(queryset, page_size)
+            )
+            self.cached_page = {
+                "number": page.number,
+                "object_list": list(object_list),
+                "count": paginator.count,
+            }
+            cache.set(
+                self.get_page_cache_key(),
+                self.cached_page,
+                GRID_PAGE_CACHE_TIMEOUT,
+            )
 
-        return queryset
+        paginator = self.get_paginator(
+            queryset,
+            page_size,
+            orphans=self.get_paginate_orphans(),
+            allow_empty_first_page=self.get_allow_empty(),
+        )
+        # seed the cached property so the paginator never runs COUNT
+        paginator.__dict__["count"] = self.cached_page["count"]
+        page = Page(
+            self.cached_page["object_list"],
+            self.cached_page["number"],
+            paginator,
+        )
+        return (paginator, page, page.object_list, page.has_other_pages())
 
 
-class ShopProductDetailView(DetailView):
+@method_decorator(condition(etag_func=get_product_page_etag), name="get")
+class ShopProductDetailView(SurrogateKeyMixin, DetailView):
     template_name = "shop/product-overview.html"
     model = ProductModel
     context_object_name = "product"
 
+    def get_surrogate_keys(self, response):
+        # the page also lists similar and latest product cards
+        return [
+            CATALOG_SURROGATE_KEY,
+            SIMILAR_PRODUCTS_SURROGATE_KEY,
+            get_product_surrogate_key(self.object.id),
+            get_category_surrogate_key(self.object.category_id),
+        ]
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        product = self.get_object()
+        product = self.object
 
-        reviews = ReviewModel.objects.filter(
+        context["reviews"] = ReviewModel.objects.filter(
             product=product, status=ReviewStatusType.accepted.value
         )
-        context["reviews"] = reviews
-
-        total_reviews = reviews.count()
-        star_counts = reviews.aggregate(
-            **{
-                f"star{star}": Count("pk", filter=Q(rate=star))
-                for star in range(1, 6)
-            }
-        )
-
-        context["star_counts"] = [
-            (
-                star,
-                star_counts[f"star{star}"],
-                (
-                    round((star_counts[f"star{star}"] / total_reviews * 100))
-                    if total_reviews
-                    else 0
-                ),
-            )
-            for star in reversed(range(1, 6))
-        ]
 
-        recommend_count = reviews.filter(rate__gte=4).count()
+        review_stats = ReviewStatsModel.get_for_product(product)
+        context["review_stats"] = review_stats
+        context["star_counts"] = review_stats.get_star_counts()
         context["recommend_percentage"] = (
-            round((recommend_count / total_reviews) * 100)
-            if total_reviews
-            else 0
+            review_stats.get_recommend_percentage()
         )
 
         return context
@@ -162,7 +188,7 @@ class AddOrRemoveWishlistView(LoginRequiredMixin, View):
         return JsonResponse({"message": message})
 
 
-class CategoriesSidebar(TemplateView):
+class CategoriesSidebar(SurrogateKeyMixin, TemplateView):
     template_name = "shop/categories-sidebar.html"
 
     def get_queryset(self):
@@ -183,9 +209,7 @@ class CategoriesSidebar(TemplateView):
         return queryset
 
     def get_min_prices(self):
-        min_prices = cache.get("min_prices_data")
-        from django.db.models import Min
-
+        price_summary = get_category_price_summary()
         categories = ProductCategoryModel.objects.filter(
             slug__in=[
                 "mobile-phones",
@@ -193,18 +217,16 @@ class CategoriesSidebar(TemplateView):
                 "womens-clothing",
                 "cosmetics",
             ]
-        ).prefetch_related("products")
+        ).values_list("id", "slug")
         min_prices = {}
-        for category in categories:
-            slug_cleaned = category.slug.replace("-", "_")
-            min_price = category.products.aggregate(min_price=Min("price"))[
-                "min_price"
-            ]
+        for category_id, slug in categories:
+            slug_cleaned = slug.replace("-", "_")
             min_prices[f"min_price_{slug_cleaned}"] = {
-                "id": category.id,
-                "min_price": min_price,
+                "id": category_id,
+                "min_price": price_summary.get(category_id, {}).get(
+                    "min_price"
+                ),
             }
-        cache.set("min_prices_data", min_prices, 60 * 60 * 24 * 7)
         return min_prices
 
     def get_context_data(self, **kwargs):
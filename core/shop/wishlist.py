@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import WishlistProductModel
+
+WISHLIST_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def get_wishlist_cache_key(user_id):
+    return f"wishlist_ids:{user_id}"
+
+
+def get_wishlist_ids(user):
+    """Set of the product ids a user wished, rebuilt from the DB on miss"""
+    if not user.is_authenticated:
+        return set()
+    cache_key = get_wishlist_cache_key(user.id)
+    wishlist_ids = cache.get(cache_key)
+    if wishlist_ids is None:
+        wishlist_ids = set(
+            WishlistProductModel.objects.filter(user=user).values_list(
+                "product_id", flat=True
+            )
+        )
+        cache.set(cache_key, wishlist_ids, WISHLIST_CACHE_TIMEOUT)
+    return wishlist_ids
+
+
+def get_wished_ids(user, product_ids):
+    """Which of the given product ids the user wished"""
+    return get_wishlist_ids(user) & set(product_ids)
+
+
+def invalidate_cached_wishlist(user_id):
+    """
+    Drop the cached set of a user once the change commits, the next
+    read rebuilds it from the DB instead of patching a shared copy.
+    """
+    transaction.on_commit(
+        lambda: cache.delete(get_wishlist_cache_key(user_id))
+    )